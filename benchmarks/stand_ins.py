@@ -0,0 +1,195 @@
+import asyncio
+import random
+import socket
+import threading
+
+
+class StandInServer:
+    """Base class of the local stand-in endpoints used by the benchmarks.
+
+    Every stand-in runs on its own asyncio loop in a daemon thread and binds
+    an ephemeral port on 127.0.0.1. Faults can be changed while it runs:
+    `latency` (seconds added before answering), `loss` (probability of
+    silently ignoring a request) and `blackhole` (never answer).
+    """
+
+    def __init__(self, latency=0.0, loss=0.0, blackhole=False):
+        self.latency = latency
+        self.loss = loss
+        self.blackhole = blackhole
+        self.host = "127.0.0.1"
+        self.port = None
+        self.requests = 0
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._serve())
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._shutdown())
+        self._loop.close()
+
+    async def _serve(self):
+        raise NotImplementedError
+
+    async def _shutdown(self):
+        pass
+
+    def _dropped(self):
+        """Decide whether the current request is left unanswered"""
+        self.requests += 1
+        return self.blackhole or (self.loss and random.random() < self.loss)
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class TcpStandIn(StandInServer):
+    """TCP endpoint for connect probes.
+
+    A TCP handshake is completed by the kernel, so latency and loss cannot be
+    injected per connection from user space. The stand-in instead supports
+    three modes: accepting, `refused` (nothing listens on the port) and
+    `blackhole` (the accept backlog is kept full, so new SYNs are dropped
+    and connects hang until the probe times out).
+    """
+
+    def __init__(self, refused=False, blackhole=False):
+        super().__init__(blackhole=blackhole)
+        self.refused = refused
+        self._server = None
+        self._sockets = []
+
+    async def _serve(self):
+        if self.refused:
+            # Reserve a port number, then release it so connects are refused
+            with socket.socket() as sock:
+                sock.bind((self.host, 0))
+                self.port = sock.getsockname()[1]
+            return
+        if self.blackhole:
+            listener = socket.socket()
+            listener.bind((self.host, 0))
+            listener.listen(0)
+            self.port = listener.getsockname()[1]
+            self._sockets.append(listener)
+            # Fill the accept queue and never accept, later SYNs are dropped
+            for _ in range(2):
+                filler = socket.socket()
+                filler.setblocking(False)
+                try:
+                    filler.connect((self.host, self.port))
+                except BlockingIOError:
+                    pass
+                self._sockets.append(filler)
+            await asyncio.sleep(0.05)
+            return
+        self._server = await asyncio.start_server(self._handle, self.host, 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        self.requests += 1
+        writer.close()
+
+    async def _shutdown(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for sock in self._sockets:
+            sock.close()
+
+    def probe_spec(self):
+        return {"type": "tcp", "host": self.host, "port": self.port}
+
+
+class _DnsStandInProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) < 12 or self.server._dropped():
+            return
+        response = self.server.build_response(data)
+        if self.server.latency:
+            asyncio.get_running_loop().call_later(self.server.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+
+class DnsStandIn(StandInServer):
+    """UDP DNS server answering every A query with 127.0.0.1"""
+
+    async def _serve(self):
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DnsStandInProtocol(self), local_addr=(self.host, 0)
+        )
+        self.port = self._transport.get_extra_info("sockname")[1]
+
+    async def _shutdown(self):
+        self._transport.close()
+
+    @staticmethod
+    def build_response(query):
+        # Copy id and question, set QR/RA flags, one answer pointing at the question name
+        header = query[:2] + b"\x81\x80" + query[4:6] + b"\x00\x01\x00\x00\x00\x00"
+        answer = b"\xc0\x0c\x00\x01\x00\x01\x00\x00\x00\x3c\x00\x04\x7f\x00\x00\x01"
+        return header + query[12:] + answer
+
+    def probe_spec(self, name="stand-in.example"):
+        return {"type": "dns", "host": name, "server": self.host, "port": self.port}
+
+
+class HttpStandIn(StandInServer):
+    """Minimal HTTP server answering every request with "204 No Content" """
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._held = []
+
+    async def _handle(self, reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        if self._dropped():
+            # Keep the connection open without answering
+            self._held.append(writer)
+            return
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _shutdown(self):
+        for writer in self._held:
+            writer.close()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def probe_spec(self):
+        return {"type": "http", "url": f"http://{self.host}:{self.port}/generate_204"}
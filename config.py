@@ -0,0 +1,126 @@
+import copy
+import json
+import os
+import sys
+
+# Default settings, overridden key by key by the optional JSON configuration file
+DEFAULT_CONFIG = {
+    # Probe set used to decide whether the Internet is reachable.
+    # Supported types: "tcp" (host, port), "dns" (host) and "http" (url, HEAD request)
+    "probes": [
+        {"type": "tcp", "host": "8.8.8.8", "port": 53},
+        {"type": "tcp", "host": "1.1.1.1", "port": 53},
+        {"type": "tcp", "host": "9.9.9.9", "port": 53},
+        {"type": "dns", "host": "www.google.com"},
+        {"type": "http", "url": "http://connectivitycheck.gstatic.com/generate_204"},
+    ],
+    # Timeout of a single probe (seconds)
+    "probe_timeout": 3.0,
+    # Number of failed probes needed to declare the connection DOWN
+    # (capped to the number of configured probes)
+    "probe_quorum": 3,
+    # Adaptive check scheduling (seconds): fast checks while the link is down
+    # or flapping, exponential back-off with jitter once it is stable
+    "check_interval_min": 2.0,
+    "check_interval_max": 60.0,
+    "check_backoff_factor": 2.0,
+    "check_jitter": 0.2,
+    # Number of latency samples kept for the rolling percentiles
+    "latency_window": 60,
+    # The connection is shown as degraded when the p95 latency exceeds this value (ms)
+    "latency_degraded_ms": 250.0,
+    # Event log backend: "text" (internet_log.txt), "sqlite" (internet_log.sqlite3)
+    # or "binary" (internet_log.bin, fixed-width records)
+    "event_store": "text",
+    # Rotation of the text log: start a new file when it reaches this size
+    # (bytes, 0 disables) and/or at the start of every month
+    "log_rotate_max_bytes": 5 * 1024 * 1024,
+    "log_rotate_monthly": False,
+    # Compression of rotated segments: "gzip", "zstd" (needs zstandard) or "none"
+    "log_compression": "gzip",
+    # Format of new text log lines: 2 (epoch milliseconds, with outage duration
+    # and latency) or 1 (legacy "YYYY/MM/DD HH:MM - EVENT"). Both are always readable
+    "log_format": 2,
+    # Events are written by a background thread. Durability of the log:
+    # "always" (fsync after every write), "interval" (at most every
+    # log_fsync_interval_ms) or "never" (left to the operating system)
+    "log_fsync": "interval",
+    "log_fsync_interval_ms": 1000,
+    # Maximum number of events waiting to be written
+    "log_queue_size": 10000,
+    # Additional targets monitored side by side with the Internet connection, e.g.
+    # {"name": "isp-b", "probes": [...], "probe_quorum": 1, "check_interval_min": 5}.
+    # Missing keys fall back to the global settings above
+    "targets": [],
+    # Probes in flight at the same time, across all targets
+    "max_concurrent_probes": 64,
+    # Prometheus/OpenMetrics endpoint (http://<address>:<port>/metrics),
+    # disabled when the port is null
+    "metrics_port": None,
+    "metrics_address": "127.0.0.1",
+    # Optional throughput test: every throughput_interval seconds, download at most
+    # throughput_max_bytes (or for throughput_max_seconds) from this HTTP(S) URL,
+    # within an hourly budget of bytes and seconds. A goodput below
+    # throughput_slow_mbps is logged as a SLOW event, its recovery as NORMAL
+    "throughput_url": None,
+    "throughput_interval": 900,
+    "throughput_max_bytes": 2_000_000,
+    "throughput_max_seconds": 10,
+    "throughput_budget_bytes_per_hour": 10_000_000,
+    "throughput_budget_seconds_per_hour": 60,
+    "throughput_slow_mbps": 5.0,
+    # Push the logged events to a fleet collector (python internet_monitor.py
+    # collector): "http://host:8765/events" or "udp://host:8766". Events are
+    # sent in batches and spooled to fleet_spool.txt while the collector is
+    # unreachable. fleet_host identifies this monitor (default: host name)
+    "fleet_url": None,
+    "fleet_host": None,
+    "fleet_batch_size": 500,
+    "fleet_flush_interval": 5.0,
+    "fleet_spool_max_events": 100000,
+    # Linux only: check the connection as soon as a network interface, address
+    # or the default route changes (rtnetlink), so local failures are detected
+    # immediately and check_interval_max can be raised to cut probe traffic
+    "link_watch": False,
+    # Opt-in timing of the hot paths and event loop stall detection (debug
+    # window on F12, dump in instrumentation.json). Loop callbacks running
+    # later than stall_threshold_ms are reported as stalls
+    "instrumentation": False,
+    "stall_threshold_ms": 200,
+}
+
+
+def get_config_file_path():
+    """Return the path of the JSON configuration file"""
+    if getattr(sys, 'frozen', False):
+        # If running as a compiled executable, use AppData folder
+        data_dir = os.path.join(os.environ.get('APPDATA', ''), 'InternetMonitor')
+        return os.path.join(data_dir, "internet_monitor_config.json")
+    else:
+        # If running as a script, use the current directory
+        return "internet_monitor_config.json"
+
+
+def get_app_path():
+    """Return the path of the executable or of the main script"""
+    if getattr(sys, 'frozen', False):
+        return sys.executable
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "internet_monitor.py")
+
+
+def load_config(path=None):
+    """Load settings from the configuration file, falling back to the defaults"""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    path = path or get_config_file_path()
+    if not os.path.exists(path):
+        return config
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            user_config = json.load(f)
+        if isinstance(user_config, dict):
+            config.update(user_config)
+        else:
+            print(f"Ignoring configuration file {path}: expected a JSON object")
+    except Exception as e:
+        print(f"Error loading configuration file {path}: {e}")
+    return config
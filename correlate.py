@@ -0,0 +1,176 @@
+"""Find the outages shared by many hosts in logs collected from a fleet.
+
+The same minute down on many hosts points at the provider rather than at
+one machine. Each host's log (rotated segments included) is parsed in a
+worker process with the rules of the event store and reduced to its outage
+intervals, aligned to a common resolution. The sorted interval boundaries
+of all hosts are then merged with a heap (k-way merge) and swept in time
+order, reporting every window where at least `min_hosts` hosts were down.
+
+Parsing, the bulk of the work, is spread over the processes with one task
+per host; only the outage intervals travel back to the parent, so the
+run time scales with the number of cores.
+"""
+import datetime
+import heapq
+import itertools
+import os
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from analytics import collect_outages
+from event_store import parse_lines
+from log_rotation import list_segments, open_segment, segment_pattern, segment_time
+
+# Name of the log files looked for in directories
+LOG_NAME = "internet_log.txt"
+# Outages are widened to whole multiples of this (ms), so that hosts down in the same minute overlap
+DEFAULT_RESOLUTION_MS = 60_000
+
+# Outages of one host: sorted, disjoint [start, end) intervals as two array('q'), plus counters
+HostOutages = namedtuple("HostOutages", ["host", "starts", "ends", "events", "errors"])
+
+# A window where at least min_hosts hosts were down together: its bounds (ms),
+# the largest number of hosts down at the same time and every host down during it
+CorrelatedOutage = namedtuple("CorrelatedOutage", ["start_ms", "end_ms", "peak_hosts", "hosts"])
+
+
+def find_host_logs(paths, log_name=LOG_NAME):
+    """Map host names to their log files (oldest segment first).
+
+    A directory is searched recursively for `log_name` and its rotated
+    segments, and the host is named after the directory holding them
+    (relative to the searched one). A file named like the log belongs to
+    the host of its directory; any other file is a host named after it.
+    Raises ValueError listing the paths that are missing or unreadable.
+    """
+    rotated_name = segment_pattern(log_name)
+    hosts = {}
+    unusable = [
+        path for path in paths
+        if not (os.path.isdir(path) or os.path.isfile(path)) or not os.access(path, os.R_OK)
+    ]
+    if unusable:
+        raise ValueError(f"Not found or not readable: {', '.join(unusable)}")
+    for path in paths:
+        if os.path.isdir(path):
+            root_name = os.path.basename(os.path.abspath(path))
+            for directory, _, names in os.walk(path):
+                log_path = os.path.join(directory, log_name)
+                files = list_segments(log_path) + ([log_path] if log_name in names else [])
+                if files:
+                    relative = os.path.relpath(directory, path)
+                    hosts.setdefault(root_name if relative == "." else relative, []).extend(files)
+            continue
+        name = os.path.basename(path)
+        if name == log_name or rotated_name.match(name):
+            host = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        else:
+            host = name.split(".", 1)[0]
+        hosts.setdefault(host, []).append(path)
+    # Rotated segments in rotation order, then the active files
+    for files in hosts.values():
+        files.sort(key=_file_order)
+    return hosts
+
+
+def _file_order(path):
+    rotated = segment_time(path)
+    return (rotated is None, rotated or datetime.datetime.min, path)
+
+
+def align_outages(starts, ends, resolution_ms):
+    """Widen outages to the resolution and merge those that then overlap, return new arrays"""
+    aligned_starts = array('q')
+    aligned_ends = array('q')
+    for start, end in sorted(zip(starts, ends)):
+        if resolution_ms > 1:
+            start -= start % resolution_ms
+            end = max(start + resolution_ms, -(-end // resolution_ms) * resolution_ms)
+        else:
+            end = max(end, start + 1)
+        if aligned_ends and start <= aligned_ends[-1]:
+            aligned_ends[-1] = max(aligned_ends[-1], end)
+        else:
+            aligned_starts.append(start)
+            aligned_ends.append(end)
+    return aligned_starts, aligned_ends
+
+
+def host_outages(task):
+    """Worker: parse the logs of one host, return its HostOutages"""
+    host, files, resolution_ms = task
+    counters = {"events": 0, "errors": 0}
+
+    def main_connection_events():
+        for path in files:
+            try:
+                with open_segment(path) as f:
+                    for event in parse_lines(f):
+                        counters["events"] += 1
+                        # Only the main Internet connection, additional targets are local matters
+                        if event.target is None:
+                            yield event
+            except (OSError, EOFError, RuntimeError) as e:
+                print(f"Error reading {path}: {e}")
+                counters["errors"] += 1
+
+    # An outage still open at the end of a log is left out, its end is unknown
+    starts, ends, _ = collect_outages(main_connection_events())
+    starts, ends = align_outages(starts, ends, resolution_ms)
+    return HostOutages(host, starts, ends, counters["events"], counters["errors"])
+
+
+def _boundaries(outages):
+    """Sorted boundaries of a host's outages: (time, -1, host) for an end, (time, +1, host) for a start"""
+    for start, end in zip(outages.starts, outages.ends):
+        yield start, 1, outages.host
+        yield end, -1, outages.host
+
+
+def sweep(host_outages_list, min_hosts=2):
+    """Yield the CorrelatedOutage windows of a list of HostOutages, oldest first"""
+    down = set()
+    window_start = None
+    window_hosts = set()
+    peak = 0
+    merged = heapq.merge(*(_boundaries(outages) for outages in host_outages_list))
+    # All the boundaries at the same time are applied before looking at the count,
+    # so a host recovering when another goes down does not split a window
+    for time_ms, boundaries in itertools.groupby(merged, key=lambda boundary: boundary[0]):
+        for _, delta, host in boundaries:
+            if delta > 0:
+                down.add(host)
+            else:
+                down.discard(host)
+        if len(down) >= min_hosts:
+            if window_start is None:
+                window_start = time_ms
+                window_hosts = set()
+                peak = 0
+            window_hosts |= down
+            peak = max(peak, len(down))
+        elif window_start is not None:
+            yield CorrelatedOutage(window_start, time_ms, peak, sorted(window_hosts))
+            window_start = None
+
+
+def correlate(paths, min_hosts=2, resolution_ms=DEFAULT_RESOLUTION_MS, workers=None, log_name=LOG_NAME):
+    """Parse the logs of many hosts in parallel, return (hosts, list of CorrelatedOutage).
+
+    `hosts` lists the HostOutages of every host found, for the totals.
+    """
+    host_logs = find_host_logs(paths, log_name)
+    tasks = [(host, files, resolution_ms) for host, files in sorted(host_logs.items())]
+    if not tasks:
+        return [], []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        hosts = [host_outages(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Several hosts per task message, the logs of a host are usually small
+            chunk_size = max(1, len(tasks) // (workers * 4))
+            hosts = list(executor.map(host_outages, tasks, chunksize=chunk_size))
+    return hosts, list(sweep(hosts, min_hosts))
@@ -0,0 +1,270 @@
+"""Time range queries over the event log.
+
+The text log and the binary store are memory-mapped and searched by
+timestamp, so a query over a long history only reads the pages around
+the start of the range and the events it returns. The search assumes that
+timestamps never go backwards: v1 text logs (local time, which repeats an
+hour at every DST fall-back) are scanned instead, and so are v2 logs found
+out of order around the search point. Rotated segments that
+end before the range are skipped by their name; compressed segments that
+overlap it are streamed. Results are yielded oldest first.
+"""
+import datetime
+import mmap
+import os
+
+from event_store import BinaryEventStore, parse_log_line
+from log_rotation import open_segment, segment_time
+
+# Slack applied to the rotation time of a segment when deciding whether it may hold events
+# of the range: events are written shortly after being timestamped, and local times are
+# ambiguous around DST changes (milliseconds)
+SEGMENT_MARGIN_MS = 3600_000
+# Lines on each side of the binary search result that must be in time order for it to be trusted,
+# and lines read past the end of a range before stopping
+ORDER_CHECK_LINES = 16
+
+
+def parse_time(value):
+    """Parse a command line time: epoch milliseconds, or an ISO local date/time (e.g. 2024-05-01 or 2024-05-01T08:30)"""
+    if value.isdigit():
+        return int(value)
+    try:
+        return int(datetime.datetime.fromisoformat(value).timestamp() * 1000)
+    except ValueError:
+        raise ValueError(f"Invalid time: {value} (expected YYYY-MM-DD[THH:MM[:SS]] or epoch milliseconds)")
+
+
+def _map(path):
+    """Memory-map a file read-only, return (file, mmap) or None if it is empty or missing"""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    try:
+        if os.fstat(f.fileno()).st_size == 0:
+            f.close()
+            return None
+        return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        f.close()
+        raise
+
+
+def _is_v2_line(data, start, end):
+    space = data.find(b" ", start, end)
+    return data[start:space if space >= 0 else end].isdigit()
+
+
+def _is_v2_log(data):
+    """True if the first and the last line of a log are v2 lines (epoch milliseconds)"""
+    first_end = data.find(b"\n")
+    last_end = len(data)
+    while last_end > 0 and data[last_end - 1:last_end] in (b"\n", b"\r"):
+        last_end -= 1
+    last_start = data.rfind(b"\n", 0, last_end) + 1
+    return _is_v2_line(data, 0, first_end if first_end >= 0 else len(data)) and _is_v2_line(data, last_start, last_end)
+
+
+def _line_timestamp(data, start, end):
+    """Timestamp (ms) of the log line data[start:end], None if it cannot be parsed"""
+    space = data.find(b" ", start, end)
+    head = data[start:space if space >= 0 else end]
+    if head.isdigit():
+        # v2 line: the timestamp is the first field
+        return int(head)
+    try:
+        event = parse_log_line(data[start:end].decode("utf-8", errors="replace"))
+    except ValueError:
+        return None
+    return event.timestamp_ms if event is not None else None
+
+
+def _nearby_timestamps(data, position, count):
+    """Timestamps of up to `count` lines on each side of the line starting at `position`, in file order"""
+    before = []
+    start = position
+    while start > 0 and len(before) < count:
+        # The end of the file may lack its final newline
+        line_end = start - 1 if data[start - 1:start] == b"\n" else start
+        previous = data.rfind(b"\n", 0, line_end) + 1
+        before.append(_line_timestamp(data, previous, line_end))
+        start = previous
+    after = []
+    start = position
+    while start < len(data) and len(after) < count:
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = len(data)
+        after.append(_line_timestamp(data, start, end))
+        start = end + 1
+    return [timestamp for timestamp in before[::-1] + after if timestamp is not None]
+
+
+def _in_order(timestamps):
+    return all(a <= b for a, b in zip(timestamps, timestamps[1:]))
+
+
+def bisect_lines(data, timestamp_ms):
+    """Byte offset of the first line with a timestamp >= timestamp_ms, or None if the log is out of order there.
+
+    Each step looks at the line around the middle of the remaining range,
+    so only O(log n) lines are read. Unparsable lines count as earlier.
+    The search assumes that timestamps never go backwards, which the
+    clock being stepped back breaks. The lines probed, and
+    ORDER_CHECK_LINES lines on each side of the result, are therefore
+    checked: if they are not in time order None is returned, and the
+    caller scans the whole file. A step far from both is not detected.
+    """
+    probes = []
+    lo, hi = 0, len(data)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = data.rfind(b"\n", 0, mid) + 1
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = len(data)
+        line_timestamp = _line_timestamp(data, start, end)
+        if line_timestamp is not None:
+            probes.append((start, line_timestamp))
+        if line_timestamp is None or line_timestamp < timestamp_ms:
+            lo = end + 1
+        else:
+            hi = start
+    position = min(lo, len(data))
+    if not _in_order([probe[1] for probe in sorted(probes)]) \
+            or not _in_order(_nearby_timestamps(data, position, ORDER_CHECK_LINES)):
+        return None
+    return position
+
+
+def iter_text_range(path, start_ms=None, end_ms=None):
+    """Yield the events of an uncompressed text log with start_ms <= timestamp < end_ms"""
+    mapped = _map(path)
+    if mapped is None:
+        return
+    f, data = mapped
+    try:
+        # v1 lines are in local time, which goes back an hour at every DST fall-back:
+        # only v2 logs (epoch milliseconds) are searched, v1 logs are scanned
+        ordered = _is_v2_log(data)
+        position = bisect_lines(data, start_ms) if start_ms is not None and ordered else 0
+        if position is None:
+            print(f"{path} is not in time order around {start_ms}, scanning all of it")
+            ordered = False
+            position = 0
+        size = len(data)
+        past_end = 0
+        while position < size:
+            end = data.find(b"\n", position)
+            if end < 0:
+                end = size
+            line = data[position:end]
+            position = end + 1
+            try:
+                event = parse_log_line(line.decode("utf-8", errors="replace"))
+            except ValueError:
+                continue
+            if event is None or (start_ms is not None and event.timestamp_ms < start_ms):
+                continue
+            if end_ms is not None and event.timestamp_ms >= end_ms:
+                # A few more lines are read before stopping, in case the clock went back right after
+                past_end += 1
+                if ordered and past_end > ORDER_CHECK_LINES:
+                    break
+                continue
+            yield event
+    finally:
+        data.close()
+        f.close()
+
+
+def iter_binary_range(path, start_ms=None, end_ms=None):
+    """Yield the events of a binary store with start_ms <= timestamp < end_ms"""
+    mapped = _map(path)
+    if mapped is None:
+        return
+    f, data = mapped
+    # Current files start with a header, legacy ones hold smaller records from the first byte
+    record, offset = BinaryEventStore.layout(data[:BinaryEventStore.HEADER.size])
+    count = max(0, len(data) - offset) // record.size
+
+    def bisect(timestamp_ms):
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if record.unpack_from(data, offset + mid * record.size)[0] < timestamp_ms:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    try:
+        lo = 0 if start_ms is None else bisect(start_ms)
+        hi = count if end_ms is None else bisect(end_ms)
+        for index in range(lo, hi):
+            yield BinaryEventStore.to_event(record.unpack_from(data, offset + index * record.size))
+    finally:
+        data.close()
+        f.close()
+
+
+def _iter_segment(path, start_ms, end_ms):
+    """Yield the events of a rotated segment in the range, mapped if uncompressed"""
+    if not path.endswith((".gz", ".zst")):
+        yield from iter_text_range(path, start_ms, end_ms)
+        return
+    past_end = 0
+    with open_segment(path) as f:
+        for line in f:
+            try:
+                event = parse_log_line(line)
+            except ValueError:
+                continue
+            if event is None or (start_ms is not None and event.timestamp_ms < start_ms):
+                continue
+            if end_ms is not None and event.timestamp_ms >= end_ms:
+                # Stopping early is only safe on v2 lines, see iter_text_range
+                past_end += 1
+                if past_end > ORDER_CHECK_LINES and line[:1].isdigit() and "/" not in line[:10]:
+                    break
+                continue
+            yield event
+
+
+def iter_text_store_range(store, start_ms=None, end_ms=None):
+    """Yield the events of a text store (rotated segments, then the active file) in the range"""
+    previous_rotation_ms = None
+    for path in store.segments():
+        rotated = segment_time(path)
+        rotation_ms = int(rotated.timestamp() * 1000) if rotated else None
+        # A segment holds the events logged between the previous rotation and its own
+        ends_before = rotation_ms is not None and start_ms is not None and rotation_ms + SEGMENT_MARGIN_MS < start_ms
+        starts_after = previous_rotation_ms is not None and end_ms is not None \
+            and previous_rotation_ms - SEGMENT_MARGIN_MS >= end_ms
+        if starts_after:
+            return
+        if not ends_before:
+            yield from _iter_segment(path, start_ms, end_ms)
+        previous_rotation_ms = rotation_ms
+    yield from iter_text_range(store.path, start_ms, end_ms)
+
+
+def query_events(store, start_ms=None, end_ms=None, event_types=None, target=None):
+    """Yield the events of a store with start_ms <= timestamp < end_ms, oldest first.
+
+    event_types limits the result to some event types, target to the events of one target.
+    """
+    if store.backend == "text":
+        events = iter_text_store_range(store, start_ms, end_ms)
+    elif store.backend == "binary":
+        events = iter_binary_range(store.path, start_ms, end_ms)
+    else:
+        # SQLite answers range queries from its timestamp index
+        events = store.iter_events(start_ms, end_ms)
+    for event in events:
+        if event_types and event.event not in event_types:
+            continue
+        if target is not None and event.target != target:
+            continue
+        yield event
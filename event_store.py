@@ -0,0 +1,717 @@
+import datetime
+import math
+import os
+import struct
+import time
+from collections import namedtuple
+
+from log_rotation import LogRotator, list_segments, open_segment
+
+# Text log formats:
+#   v1: "YYYY/MM/DD HH:MM - EVENT[ - TARGET]", local time with minute precision
+#   v2: "EPOCH_MS EVENT DURATION_MS LATENCY_MS[ TARGET]", UTC milliseconds, "-" for
+#       a missing duration/latency; parsed with a plain split() and int()
+# Both can be read, even mixed in the same file; new lines are written as v2 unless
+# the "log_format" setting asks for v1
+LOG_TIMESTAMP_FORMAT = "%Y/%m/%d %H:%M"
+LOG_FORMAT_VERSIONS = (1, 2)
+DEFAULT_LOG_FORMAT = 2
+
+# A logged event: timestamp in milliseconds since the Unix epoch, event type, the name
+# of the monitored target (None for the main Internet connection), and for an UP event
+# the outage duration and the latency of the check that ended it (ms, v2 only); a
+# NORMAL event carries the duration of the slow period it ends
+Event = namedtuple(
+    "Event", ["timestamp_ms", "event", "target", "duration_ms", "latency_ms"], defaults=(None, None, None)
+)
+
+# Numeric event codes used by the binary backend. SLOW/NORMAL mark the periods
+# where the measured throughput was below the configured threshold
+EVENT_CODES = {"DOWN": 1, "UP": 2, "SLOW": 3, "NORMAL": 4}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+
+def now_ms():
+    """Return the current time in milliseconds since the Unix epoch"""
+    return time.time_ns() // 1_000_000
+
+
+def to_datetime(timestamp_ms):
+    """Convert an epoch timestamp in milliseconds to a local datetime"""
+    return datetime.datetime.fromtimestamp(timestamp_ms / 1000)
+
+
+def _optional(field, convert):
+    return None if field == "-" else convert(field)
+
+
+def _parse_v1_timestamp(timestamp_str):
+    """Convert a v1 "YYYY/MM/DD HH:MM" local timestamp to epoch milliseconds"""
+    if len(timestamp_str) == 16 and timestamp_str[4] == "/" and timestamp_str[7] == "/" and timestamp_str[13] == ":":
+        # Fixed-width fields, much cheaper than strptime
+        dt_obj = datetime.datetime(
+            int(timestamp_str[0:4]), int(timestamp_str[5:7]), int(timestamp_str[8:10]),
+            int(timestamp_str[11:13]), int(timestamp_str[14:16]),
+        )
+    else:
+        dt_obj = datetime.datetime.strptime(timestamp_str, LOG_TIMESTAMP_FORMAT)
+    return int(dt_obj.timestamp() * 1000)
+
+
+def parse_log_line(line):
+    """Parse a v1 or v2 text log line into an Event.
+
+    Returns None for blank lines and raises ValueError for malformed ones.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line[0].isdigit() and "/" not in line[:10]:
+        # v2: the target name is the last field and may itself contain spaces
+        fields = line.split(None, 4)
+        if len(fields) < 4:
+            raise ValueError(f"Malformed log line: {line}")
+        return Event(
+            int(fields[0]),
+            fields[1],
+            fields[4] if len(fields) == 5 else None,
+            _optional(fields[2], int),
+            _optional(fields[3], float),
+        )
+    # v1: the target name is the last field and may itself contain " - "
+    parts = line.split(" - ", 2)
+    if len(parts) < 2:
+        raise ValueError(f"Malformed log line: {line}")
+    timestamp_str, event = parts[0], parts[1]
+    return Event(_parse_v1_timestamp(timestamp_str), event, parts[2] if len(parts) == 3 else None)
+
+
+def format_log_line(event, version=DEFAULT_LOG_FORMAT):
+    """Format an Event as a text log line (without the trailing newline)"""
+    if version == 1:
+        timestamp = to_datetime(event.timestamp_ms).strftime(LOG_TIMESTAMP_FORMAT)
+        if event.target is not None:
+            return f"{timestamp} - {event.event} - {event.target}"
+        return f"{timestamp} - {event.event}"
+    duration = "-" if event.duration_ms is None else str(int(event.duration_ms))
+    latency = "-" if event.latency_ms is None else f"{event.latency_ms:.1f}"
+    if event.target is not None:
+        return f"{event.timestamp_ms} {event.event} {duration} {latency} {event.target}"
+    return f"{event.timestamp_ms} {event.event} {duration} {latency}"
+
+
+def iter_lines_reversed(path, block_size=65536):
+    """Yield the lines of a file from the last one to the first.
+
+    The file is read backwards in fixed-size blocks, so finding the most
+    recent events costs the same whatever the size of the file.
+    """
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size) + remainder
+            lines = block.split(b"\n")
+            # The first piece may be the tail of a line that starts in an earlier block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode("utf-8", errors="replace")
+        yield remainder.decode("utf-8", errors="replace")
+
+
+class EventStore:
+    """Interface of the event log backends"""
+    backend = None
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, event_type, timestamp_ms=None):
+        """Append an event, timestamped now unless timestamp_ms is given"""
+        raise NotImplementedError
+
+    def append_many(self, events):
+        """Append several Event objects at once"""
+        for event in events:
+            self.append(event.event, event.timestamp_ms)
+
+    def last_event(self, event_type=None):
+        """Return the most recent event (of the given type), or None"""
+        raise NotImplementedError
+
+    def last_events(self):
+        """Return the (last DOWN, last UP) events, either of which may be None"""
+        return self.last_event("DOWN"), self.last_event("UP")
+
+    def count_events(self, event_type, start_ms=None, end_ms=None):
+        """Count events of a type with start_ms <= timestamp < end_ms"""
+        raise NotImplementedError
+
+    def iter_events(self, start_ms=None, end_ms=None):
+        """Yield events in log order, optionally limited to a time range"""
+        raise NotImplementedError
+
+    def sync(self):
+        """Flush the events written so far to disk"""
+        if not os.path.exists(self.path):
+            return
+        # Opened for appending: Windows refuses to fsync a read-only descriptor
+        with open(self.path, "ab") as f:
+            os.fsync(f.fileno())
+
+    def exists(self):
+        """True if the backing file exists"""
+        return os.path.exists(self.path)
+
+    def is_empty(self):
+        """True if the store holds no events"""
+        return self.last_event() is None
+
+    def delete(self):
+        """Delete all stored events and the backing file"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        """Release any resource held by the store"""
+        pass
+
+
+def parse_lines(lines):
+    """Parse text log lines into events, skipping blank and malformed ones"""
+    for line in lines:
+        # Inlined fast path for the common v2 line of the main connection
+        fields = line.split()
+        if len(fields) == 4 and fields[0].isdigit():
+            try:
+                yield Event(
+                    int(fields[0]), fields[1], None,
+                    None if fields[2] == "-" else int(fields[2]),
+                    None if fields[3] == "-" else float(fields[3]),
+                )
+                continue
+            except ValueError:
+                pass
+        try:
+            event = parse_log_line(line)
+        except ValueError:
+            print(f"Skipping malformed log line: {line.strip()}") # Log to console for debugging
+            continue # Skip malformed lines
+        if event is not None:
+            yield event
+
+
+class TextEventStore(EventStore):
+    """Plain text log, one line per event in the v2 (or v1) format.
+
+    Events of additional monitored targets carry the target name as the
+    last field. With a LogRotator the log is split into compressed segments; readers
+    stream the segments in order followed by the active file.
+    """
+    backend = "text"
+
+    def __init__(self, path, rotator=None, version=DEFAULT_LOG_FORMAT):
+        super().__init__(path)
+        self.rotator = rotator
+        self.version = version
+
+    def _rotate_if_needed(self):
+        if self.rotator is None:
+            return
+        try:
+            if self.rotator.should_rotate():
+                self.rotator.rotate()
+        except Exception as e:
+            print(f"Error rotating log file {self.path}: {e}")
+
+    def _write(self, text):
+        self._rotate_if_needed()
+        with open(self.path, "a") as f:
+            f.write(text)
+        if self.rotator is not None:
+            self.rotator.note_append()
+
+    def append(self, event_type, timestamp_ms=None, target=None):
+        if timestamp_ms is None:
+            timestamp_ms = now_ms()
+        self._write(format_log_line(Event(timestamp_ms, event_type, target), self.version) + "\n")
+
+    def append_many(self, events):
+        self._write("".join(format_log_line(event, self.version) + "\n" for event in events))
+
+    def segments(self):
+        """Return the rotated segments of the log, oldest first"""
+        return list_segments(self.path)
+
+    def iter_events(self, start_ms=None, end_ms=None):
+        for path in self.segments() + [self.path]:
+            if not os.path.exists(path):
+                continue
+            # Segments are decompressed while streaming, never loaded whole in memory
+            with open_segment(path) as f:
+                for event in parse_lines(f):
+                    if start_ms is not None and event.timestamp_ms < start_ms:
+                        continue
+                    if end_ms is not None and event.timestamp_ms >= end_ms:
+                        continue
+                    yield event
+
+    def iter_events_reversed(self):
+        """Yield the events of the active file from the most recent one, reading it backwards"""
+        if not os.path.exists(self.path):
+            return
+        yield from parse_lines(iter_lines_reversed(self.path))
+
+    def _last_in_segments(self, wanted):
+        """Find the latest event of each wanted type in the segments, newest segment first"""
+        found = {}
+        for path in reversed(self.segments()):
+            latest = {}
+            # Compressed segments cannot be read backwards, stream them instead
+            with open_segment(path) as f:
+                for event in parse_lines(f):
+                    if event.event in wanted:
+                        latest[event.event] = event
+                    if None in wanted:
+                        latest[None] = event
+            for event_type in list(wanted):
+                if event_type in latest:
+                    found[event_type] = latest[event_type]
+                    wanted.discard(event_type)
+            if not wanted:
+                break
+        return found
+
+    def last_event(self, event_type=None):
+        for event in self.iter_events_reversed():
+            if event_type is None or event.event == event_type:
+                return event
+        return self._last_in_segments({event_type}).get(event_type)
+
+    def last_events(self):
+        # Stop reading as soon as the latest DOWN and UP have both been found
+        last_down = None
+        last_up = None
+        for event in self.iter_events_reversed():
+            if event.event == "DOWN" and last_down is None:
+                last_down = event
+            elif event.event == "UP" and last_up is None:
+                last_up = event
+            if last_down is not None and last_up is not None:
+                return last_down, last_up
+        wanted = {event_type for event_type, event in (("DOWN", last_down), ("UP", last_up)) if event is None}
+        found = self._last_in_segments(wanted)
+        return last_down or found.get("DOWN"), last_up or found.get("UP")
+
+    def last_events_by_target(self, targets):
+        """Return {target: (last DOWN, last UP)} for the given target names in one backward pass"""
+        found = {target: [None, None] for target in targets}
+        missing = 2 * len(found)
+
+        def take(event):
+            slots = found.get(event.target)
+            index = {"DOWN": 0, "UP": 1}.get(event.event)
+            if slots is None or index is None or slots[index] is not None:
+                return 0
+            slots[index] = event
+            return 1
+
+        for event in self.iter_events_reversed():
+            missing -= take(event)
+            if not missing:
+                break
+        else:
+            # Some targets have no recent events, look for them in the segments
+            for path in reversed(self.segments()):
+                latest = {}
+                with open_segment(path) as f:
+                    for event in parse_lines(f):
+                        if event.target in found:
+                            latest[event.target, event.event] = event
+                for event in latest.values():
+                    missing -= take(event)
+                if not missing:
+                    break
+        return {target: tuple(slots) for target, slots in found.items()}
+
+    def count_events(self, event_type, start_ms=None, end_ms=None):
+        return sum(1 for event in self.iter_events(start_ms, end_ms) if event.event == event_type)
+
+    def exists(self):
+        return os.path.exists(self.path) or bool(self.segments())
+
+    def delete(self):
+        for path in self.segments():
+            os.remove(path)
+        super().delete()
+
+
+class SQLiteEventStore(EventStore):
+    """SQLite database in WAL mode with indexes for time range and per-type lookups"""
+    backend = "sqlite"
+    # Schema version kept in PRAGMA user_version: 2 added the duration and latency columns
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._conn = None
+
+    @property
+    def conn(self):
+        """Open the database on first use"""
+        if self._conn is None:
+            # Imported here so that the text and binary backends don't pay for it
+            import sqlite3
+            # Written from the log writer thread, read from the GUI thread
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY, timestamp INTEGER NOT NULL, event TEXT NOT NULL, "
+                "duration_ms INTEGER, latency_ms REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events_time ON events (timestamp, event)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON events (event, timestamp)")
+            self._upgrade_schema()
+            self._conn.commit()
+        return self._conn
+
+    def _upgrade_schema(self):
+        """Add the columns missing from a database created by an earlier version"""
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] >= self.SCHEMA_VERSION:
+            return
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(events)")}
+        # Events logged before the upgrade keep NULL durations and latencies
+        for column, column_type in (("duration_ms", "INTEGER"), ("latency_ms", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE events ADD COLUMN {column} {column_type}")
+        self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def append(self, event_type, timestamp_ms=None):
+        if timestamp_ms is None:
+            timestamp_ms = now_ms()
+        with self.conn:
+            self.conn.execute("INSERT INTO events (timestamp, event) VALUES (?, ?)", (timestamp_ms, event_type))
+
+    def append_many(self, events):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (timestamp, event, duration_ms, latency_ms) VALUES (?, ?, ?, ?)",
+                ((event.timestamp_ms, event.event, event.duration_ms, event.latency_ms) for event in events),
+            )
+
+    @staticmethod
+    def _to_event(row):
+        timestamp_ms, event_type, duration_ms, latency_ms = row
+        return Event(timestamp_ms, event_type, None, duration_ms, latency_ms)
+
+    def last_event(self, event_type=None):
+        if event_type is None:
+            row = self.conn.execute(
+                "SELECT timestamp, event, duration_ms, latency_ms FROM events "
+                "ORDER BY timestamp DESC, id DESC LIMIT 1"
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT timestamp, event, duration_ms, latency_ms FROM events WHERE event = ? "
+                "ORDER BY timestamp DESC LIMIT 1",
+                (event_type,),
+            ).fetchone()
+        return self._to_event(row) if row else None
+
+    def count_events(self, event_type, start_ms=None, end_ms=None):
+        query = "SELECT COUNT(*) FROM events WHERE event = ?"
+        params = [event_type]
+        if start_ms is not None:
+            query += " AND timestamp >= ?"
+            params.append(start_ms)
+        if end_ms is not None:
+            query += " AND timestamp < ?"
+            params.append(end_ms)
+        return self.conn.execute(query, params).fetchone()[0]
+
+    def iter_events(self, start_ms=None, end_ms=None):
+        if not os.path.exists(self.path):
+            return
+        query = (
+            "SELECT timestamp, event, duration_ms, latency_ms FROM events "
+            "WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp, id"
+        )
+        params = (
+            start_ms if start_ms is not None else -2**63,
+            end_ms if end_ms is not None else 2**63 - 1,
+        )
+        for row in self.conn.execute(query, params):
+            yield self._to_event(row)
+
+    def is_empty(self):
+        if not os.path.exists(self.path):
+            return True
+        return self.conn.execute("SELECT 1 FROM events LIMIT 1").fetchone() is None
+
+    def sync(self):
+        # With synchronous=NORMAL commits are durable once the WAL is checkpointed
+        if self._conn is not None:
+            self._conn.execute("PRAGMA wal_checkpoint(FULL)")
+
+    def delete(self):
+        super().delete()
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class BinaryEventStore(EventStore):
+    """Append-only file of fixed-width 32-byte records after a 32-byte header.
+
+    Each record holds the timestamp (int64 ms), the event code, the number
+    of DOWN events logged so far, the outage (or slow period) duration in ms
+    (-1 when absent) and the latency of the check in ms (NaN when absent).
+    Records are kept in timestamp order, so a time range is located by
+    binary search and outages in the range are counted from the difference
+    of the two running totals. Files written by earlier versions (16-byte
+    records, no header) are still read, and converted before the first append.
+    """
+    backend = "binary"
+    MAGIC = b"IMEVENTS"
+    FORMAT_VERSION = 2
+    HEADER = struct.Struct("<8sI20x")
+    RECORD = struct.Struct("<qB3xIqd")
+    # Layout of the files written before the duration and latency were stored
+    LEGACY_RECORD = struct.Struct("<qB3xI")
+
+    @classmethod
+    def layout(cls, head):
+        """Return (record struct, offset of the first record) for a file starting with `head`"""
+        if head[:len(cls.MAGIC)] == cls.MAGIC:
+            return cls.RECORD, cls.HEADER.size
+        return cls.LEGACY_RECORD, 0
+
+    def _open(self, mode="rb"):
+        """Open the file, return (file, record struct, offset, record count)"""
+        f = open(self.path, mode)
+        f.seek(0)
+        record, offset = self.layout(f.read(self.HEADER.size))
+        size = os.fstat(f.fileno()).st_size
+        return f, record, offset, max(0, size - offset) // record.size
+
+    @staticmethod
+    def _read_record(f, record, offset, index):
+        f.seek(offset + index * record.size)
+        return record.unpack(f.read(record.size))
+
+    @staticmethod
+    def to_event(record):
+        """Convert an unpacked record of either layout to an Event"""
+        if len(record) == 3:
+            timestamp_ms, code, _ = record
+            return Event(timestamp_ms, EVENT_NAMES.get(code, str(code)))
+        timestamp_ms, code, _, duration_ms, latency_ms = record
+        return Event(
+            timestamp_ms, EVENT_NAMES.get(code, str(code)), None,
+            None if duration_ms < 0 else duration_ms,
+            None if math.isnan(latency_ms) else latency_ms,
+        )
+
+    def _upgrade(self):
+        """Rewrite a file in the legacy layout in the current one, atomically"""
+        with open(self.path, "rb") as f:
+            record, offset = self.layout(f.read(self.HEADER.size))
+            if record is self.RECORD:
+                return
+            f.seek(0)
+            data = f.read()
+        temp_path = self.path + ".upgrading"
+        with open(temp_path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION))
+            f.write(b"".join(
+                self.RECORD.pack(timestamp_ms, code, down_total, -1, math.nan)
+                for timestamp_ms, code, down_total in self.LEGACY_RECORD.iter_unpack(
+                    data[:len(data) - len(data) % self.LEGACY_RECORD.size]
+                )
+            ))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        print(f"Converted {self.path} to binary event format v{self.FORMAT_VERSION}")
+
+    def append(self, event_type, timestamp_ms=None):
+        self.append_many([Event(now_ms() if timestamp_ms is None else timestamp_ms, event_type)])
+
+    def append_many(self, events):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            self._upgrade()
+        else:
+            with open(self.path, "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION))
+        last_ts, down_total = -2**63, 0
+        f, record, offset, count = self._open("ab+")
+        with f:
+            if count:
+                last_ts, _, down_total, _, _ = self._read_record(f, record, offset, count - 1)
+            chunks = []
+            for event in events:
+                code = EVENT_CODES.get(event.event)
+                if code is None:
+                    print(f"Skipping event with unknown type: {event.event}")
+                    continue
+                if event.event == "DOWN":
+                    down_total += 1
+                # Keep records sorted even if the clock steps backwards
+                last_ts = max(last_ts, event.timestamp_ms)
+                chunks.append(record.pack(
+                    last_ts, code, down_total,
+                    -1 if event.duration_ms is None else int(event.duration_ms),
+                    math.nan if event.latency_ms is None else float(event.latency_ms),
+                ))
+            f.seek(0, os.SEEK_END)
+            f.write(b"".join(chunks))
+
+    def _bisect(self, f, record, offset, count, timestamp_ms):
+        """Index of the first record with timestamp >= timestamp_ms"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._read_record(f, record, offset, mid)[0] < timestamp_ms:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def last_event(self, event_type=None):
+        if not os.path.exists(self.path):
+            return None
+        code = EVENT_CODES.get(event_type) if event_type else None
+        f, record, offset, count = self._open()
+        with f:
+            for index in range(count - 1, -1, -1):
+                values = self._read_record(f, record, offset, index)
+                if code is None or values[1] == code:
+                    return self.to_event(values)
+        return None
+
+    def count_events(self, event_type, start_ms=None, end_ms=None):
+        if not os.path.exists(self.path):
+            return 0
+        f, record, offset, count = self._open()
+        with f:
+            if not count:
+                return 0
+            lo = 0 if start_ms is None else self._bisect(f, record, offset, count, start_ms)
+            hi = count if end_ms is None else self._bisect(f, record, offset, count, end_ms)
+            if hi <= lo:
+                return 0
+            if event_type == "DOWN":
+                before = self._read_record(f, record, offset, lo - 1)[2] if lo else 0
+                return self._read_record(f, record, offset, hi - 1)[2] - before
+            code = EVENT_CODES.get(event_type)
+            return sum(1 for index in range(lo, hi) if self._read_record(f, record, offset, index)[1] == code)
+
+    def iter_events(self, start_ms=None, end_ms=None):
+        if not os.path.exists(self.path):
+            return
+        f, record, offset, count = self._open()
+        with f:
+            lo = 0 if start_ms is None else self._bisect(f, record, offset, count, start_ms)
+            hi = count if end_ms is None else self._bisect(f, record, offset, count, end_ms)
+            f.seek(offset + lo * record.size)
+            remaining = hi - lo
+            while remaining > 0:
+                batch = min(remaining, 4096)
+                data = f.read(batch * record.size)
+                for values in record.iter_unpack(data):
+                    yield self.to_event(values)
+                remaining -= batch
+
+
+EVENT_STORE_BACKENDS = {
+    "text": TextEventStore,
+    "sqlite": SQLiteEventStore,
+    "binary": BinaryEventStore,
+}
+
+# File extension used by each backend, replacing the ".txt" of the text log
+EVENT_STORE_EXTENSIONS = {
+    "text": ".txt",
+    "sqlite": ".sqlite3",
+    "binary": ".bin",
+}
+
+
+def open_event_store(config, text_log_path):
+    """Create the event store selected in the configuration, stored next to the text log"""
+    backend = config["event_store"]
+    if backend not in EVENT_STORE_BACKENDS:
+        print(f"Unknown event store backend '{backend}', using text log")
+        backend = "text"
+    path = os.path.splitext(text_log_path)[0] + EVENT_STORE_EXTENSIONS[backend]
+    if backend == "text":
+        rotator = LogRotator(
+            path,
+            max_bytes=config["log_rotate_max_bytes"],
+            monthly=config["log_rotate_monthly"],
+            compression=config["log_compression"],
+        )
+        return TextEventStore(path, rotator, config["log_format"])
+    return EVENT_STORE_BACKENDS[backend](path)
+
+
+def import_text_log(text_log_path, store, batch_size=10000):
+    """Copy the events of a text log into another store, return the number imported"""
+    source = TextEventStore(text_log_path)
+    imported = 0
+    batch = []
+    for event in source.iter_events():
+        batch.append(event)
+        if len(batch) >= batch_size:
+            store.append_many(batch)
+            imported += len(batch)
+            batch = []
+    if batch:
+        store.append_many(batch)
+        imported += len(batch)
+    return imported
+
+
+def export_text_log(store, text_log_path, version=DEFAULT_LOG_FORMAT):
+    """Write all the events of a store to a text log file"""
+    with open(text_log_path, "w") as f:
+        for event in store.iter_events():
+            f.write(format_log_line(event, version) + "\n")
+
+
+def convert_text_log(path, version=DEFAULT_LOG_FORMAT, batch_size=10000):
+    """Rewrite a plain text log in the given format version, return the number of events.
+
+    The file is written next to the original and swapped in atomically, so an
+    interrupted conversion leaves the original untouched. Compressed segments
+    are read in either format and don't need converting.
+    """
+    if version not in LOG_FORMAT_VERSIONS:
+        raise ValueError(f"Unknown log format version: {version}")
+    temp_path = path + ".converting"
+    converted = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as source, open(temp_path, "w") as target:
+        batch = []
+        for event in parse_lines(source):
+            batch.append(format_log_line(event, version) + "\n")
+            if len(batch) >= batch_size:
+                target.write("".join(batch))
+                converted += len(batch)
+                batch = []
+        target.write("".join(batch))
+        converted += len(batch)
+        target.flush()
+        os.fsync(target.fileno())
+    os.replace(temp_path, path)
+    return converted
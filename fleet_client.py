@@ -0,0 +1,228 @@
+import json
+import os
+import queue
+import socket
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+
+from event_store import format_log_line, parse_log_line
+
+# Longest delay between two delivery attempts while the collector is unreachable (seconds)
+MAX_RETRY_DELAY = 300.0
+# Events per UDP datagram, keeps datagrams under a typical MTU
+UDP_BATCH = 20
+# Client errors worth retrying: the collector timed out or asked to slow down
+RETRIED_CLIENT_ERRORS = (408, 429)
+
+
+def encode_batch(host, events):
+    """Encode events as the JSON document accepted by the collector"""
+    return json.dumps({
+        "host": host,
+        "events": [
+            [event.timestamp_ms, event.event, event.target, event.duration_ms, event.latency_ms]
+            for event in events
+        ],
+    }, separators=(",", ":")).encode("utf-8")
+
+
+class FleetPusher:
+    """Push logged events to a fleet collector, in batches, from a daemon thread.
+
+    `url` is either http(s)://host:port/events (acknowledged delivery) or
+    udp://host:port (best effort, one datagram per few events). Events are
+    sent when `batch_size` of them are waiting or every `flush_interval`
+    seconds. When the collector cannot be reached they are kept in a
+    local spool file (v2 log lines) and retried with exponential back-off,
+    oldest first, also across restarts. The collector discards events it
+    has already stored, so a batch sent twice does no harm. A batch the
+    collector rejects (4xx answer) would be rejected again: it is moved to
+    a quarantine file next to the spool instead of being retried.
+    """
+
+    def __init__(self, url, spool_path, host=None, batch_size=500, flush_interval=5.0,
+                 max_spool_events=100000, timeout=5.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https", "udp") or not parts.hostname:
+            raise ValueError(f"Unsupported fleet collector URL: {url}")
+        if parts.scheme == "udp" and not parts.port:
+            raise ValueError(f"Missing port in fleet collector URL: {url}")
+        self.url = url
+        self.scheme = parts.scheme
+        self.address = (parts.hostname, parts.port)
+        self.spool_path = spool_path
+        self.host = host or socket.gethostname()
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.max_spool_events = int(max_spool_events)
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._offline = False
+
+        # Counters
+        self.events_sent = 0
+        self.events_dropped = 0
+        self.events_rejected = 0
+        self.failures = 0
+        # Events waiting in the spool file after the last delivery attempt
+        self.spool_size = 0
+
+        self._thread = threading.Thread(target=self._run, name="FleetPusher", daemon=True)
+        self._thread.start()
+
+    def submit(self, event):
+        """Queue an event for delivery"""
+        self._queue.put(event)
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def close(self, timeout=None):
+        """Make a last delivery attempt, spool what could not be sent and stop"""
+        if self._stopping:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(self.timeout * 2 if timeout is None else timeout)
+
+    def stats(self):
+        """Return the delivery counters as a dict"""
+        return {
+            "queued": self._queue.qsize(),
+            "sent": self.events_sent,
+            "spooled": self.spool_size,
+            "dropped": self.events_dropped,
+            "rejected": self.events_rejected,
+            "failures": self.failures,
+        }
+
+    def _run(self):
+        """Pusher thread body"""
+        delay = self.flush_interval
+        while True:
+            self._wake.wait(delay)
+            self._wake.clear()
+            stopping = self._stopping
+            if self._deliver():
+                delay = self.flush_interval
+            else:
+                # Collector unreachable: back off, the events wait in the spool
+                delay = min(MAX_RETRY_DELAY, max(delay, self.flush_interval) * 2)
+            if stopping:
+                return
+
+    def _take_queued(self):
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _deliver(self):
+        """Send the spooled events, then the queued ones; return False if the collector is unreachable"""
+        queued = self._take_queued()
+        spooled = self._read_spool()
+        pending = spooled + queued
+        # Events handled so far, sent or quarantined
+        done = 0
+        error = None
+        while done < len(pending):
+            batch = pending[done:done + self.batch_size]
+            try:
+                self._send(batch)
+                self.events_sent += len(batch)
+            except urllib.error.HTTPError as e:
+                if not 400 <= e.code < 500 or e.code in RETRIED_CLIENT_ERRORS:
+                    error = e
+                    self.failures += 1
+                    break
+                # Permanent rejection, retrying would be rejected forever and block the events behind it
+                print(f"Fleet collector {self.url} rejected {len(batch)} events ({e.code} {e.reason}), "
+                      f"moved to {self.quarantine_path}")
+                self._quarantine(batch)
+            except (OSError, urllib.error.URLError) as e:
+                error = e
+                self.failures += 1
+                break
+            done += len(batch)
+
+        if error is not None:
+            if not self._offline:
+                print(f"Fleet collector {self.url} unreachable, spooling events: {error}")
+                self._offline = True
+            # Keep the undelivered events on disk, oldest first
+            self._write_spool(pending[done:])
+            return False
+        if self._offline:
+            print(f"Fleet collector {self.url} reachable again, {len(spooled)} spooled events sent")
+            self._offline = False
+        if spooled:
+            self._write_spool([])
+        return True
+
+    def _send(self, events):
+        """Send a batch, raise OSError if it was not delivered (HTTPError if it was refused)"""
+        if self.scheme == "udp":
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                for start in range(0, len(events), UDP_BATCH):
+                    sock.sendto(encode_batch(self.host, events[start:start + UDP_BATCH]), self.address)
+            return
+        request = urllib.request.Request(
+            self.url, data=encode_batch(self.host, events),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        # Non-2xx answers raise HTTPError, a URLError
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+    def _read_spool(self):
+        if not os.path.exists(self.spool_path):
+            return []
+        events = []
+        try:
+            with open(self.spool_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = parse_log_line(line)
+                    except ValueError:
+                        continue
+                    if event is not None:
+                        events.append(event)
+        except OSError as e:
+            print(f"Error reading fleet spool {self.spool_path}: {e}")
+        return events
+
+    @property
+    def quarantine_path(self):
+        """File of the events rejected by the collector, kept for inspection"""
+        return self.spool_path + ".rejected"
+
+    def _quarantine(self, events):
+        self.events_rejected += len(events)
+        try:
+            with open(self.quarantine_path, "a", encoding="utf-8") as f:
+                f.write("".join(format_log_line(event) + "\n" for event in events))
+        except OSError as e:
+            print(f"Error writing fleet quarantine {self.quarantine_path}: {e}")
+
+    def _write_spool(self, events):
+        """Replace the spool with the given events, dropping the oldest beyond the cap"""
+        if len(events) > self.max_spool_events:
+            self.events_dropped += len(events) - self.max_spool_events
+            events = events[-self.max_spool_events:]
+        self.spool_size = len(events)
+        try:
+            if not events:
+                if os.path.exists(self.spool_path):
+                    os.remove(self.spool_path)
+                return
+            temp_path = self.spool_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write("".join(format_log_line(event) + "\n" for event in events))
+            os.replace(temp_path, self.spool_path)
+        except OSError as e:
+            print(f"Error writing fleet spool {self.spool_path}: {e}")
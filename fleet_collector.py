@@ -0,0 +1,260 @@
+"""Collector receiving the events pushed by a fleet of monitors (see fleet_client.py).
+
+Batches arrive as JSON documents, {"host": ..., "events": [[timestamp_ms,
+event, target, duration_ms, latency_ms], ...]}, over HTTP (POST /events,
+answered once stored) or UDP (one document per datagram). They are stored
+in an indexed SQLite database where an event already received from the
+same host is ignored, so monitors can safely resend after a failure.
+"""
+import json
+import select
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_DB_PATH = "fleet_events.sqlite3"
+DEFAULT_PORT = 8765
+# Largest accepted HTTP batch (bytes)
+MAX_BODY = 16 * 1024 * 1024
+# Most events stored in one transaction by the UDP listener
+UDP_MAX_ROWS = 5000
+# Range of the SQLite INTEGER column holding the timestamps
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+
+def _is_int(value):
+    # bool is a subclass of int, but true and false are not numbers here
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_batch(data):
+    """Decode a pushed batch into (host, rows), raise ValueError if malformed"""
+    try:
+        document = json.loads(data)
+        host = document["host"]
+        events = document["events"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"malformed batch: {e}")
+    if not isinstance(host, str) or not host or not isinstance(events, list):
+        raise ValueError("malformed batch: missing host or events")
+    rows = []
+    for item in events:
+        if not isinstance(item, list) or len(item) != 5:
+            raise ValueError(f"malformed event: {item!r}")
+        timestamp_ms, event, target, duration_ms, latency_ms = item
+        # Every field is checked here, anything else would only fail in the middle of the transaction
+        if (not _is_int(timestamp_ms) or not INT64_MIN <= timestamp_ms <= INT64_MAX
+                or not isinstance(event, str)
+                or not (target is None or isinstance(target, str))
+                or not (duration_ms is None or (_is_int(duration_ms) and INT64_MIN <= duration_ms <= INT64_MAX))
+                or not (latency_ms is None or _is_int(latency_ms) or isinstance(latency_ms, float))):
+            raise ValueError(f"malformed event: {item!r}")
+        # The main connection is stored with an empty target so the uniqueness constraint applies to it
+        rows.append((host, timestamp_ms, event, target or "", duration_ms, latency_ms))
+    return host, rows
+
+
+class FleetStore:
+    """SQLite store of the events of every monitor, deduplicated by host and timestamp"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        # Written from the HTTP and UDP threads, one transaction at a time
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # An event is identified by its host, target, timestamp and type: two
+        # targets (or a DOWN and an UP) of one host may share a millisecond
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "host TEXT NOT NULL, timestamp INTEGER NOT NULL, event TEXT NOT NULL, target TEXT NOT NULL, "
+            "duration_ms INTEGER, latency_ms REAL, received INTEGER NOT NULL, "
+            "UNIQUE (host, timestamp, target, event))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events_time ON events (timestamp, event)")
+        self._conn.commit()
+        # Counters
+        self.inserted = 0
+        self.duplicates = 0
+        self.batches = 0
+        self.errors = 0
+
+    def ingest(self, rows):
+        """Store a batch of rows, return the number of new events"""
+        received = time.time_ns() // 1_000_000
+        with self._lock:
+            before = self._conn.total_changes
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO events (host, timestamp, event, target, duration_ms, latency_ms, received) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (row + (received,) for row in rows),
+                )
+            inserted = self._conn.total_changes - before
+            self.inserted += inserted
+            self.duplicates += len(rows) - inserted
+            self.batches += 1
+        return inserted
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def stats(self):
+        return {"batches": self.batches, "inserted": self.inserted, "duplicates": self.duplicates, "errors": self.errors}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _CollectorHandler(BaseHTTPRequestHandler):
+    """Accept batches on POST /events, report the counters on GET /stats"""
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0] != "/events":
+            self.send_error(404)
+            return
+        length_header = (self.headers.get("Content-Length") or "").strip()
+        if not (length_header.isascii() and length_header.isdigit()) or int(length_header) == 0:
+            self.send_error(400, "missing or invalid Content-Length")
+            return
+        length = int(length_header)
+        if length > MAX_BODY:
+            self.send_error(413)
+            return
+        try:
+            _, rows = decode_batch(self.rfile.read(length))
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        try:
+            inserted = self.server.store.ingest(rows)
+        except (sqlite3.Error, OverflowError) as e:
+            print(f"Error storing a fleet batch: {e}")
+            self.server.store.errors += 1
+            self.send_error(500, "batch not stored")
+            return
+        self._reply({"received": len(rows), "inserted": inserted})
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/stats":
+            self.send_error(404)
+            return
+        self._reply(self.server.store.stats())
+
+    def _reply(self, document):
+        body = json.dumps(document).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One request per batch and per monitor, keep the console quiet
+        pass
+
+
+class FleetCollector:
+    """HTTP and optional UDP listeners feeding a FleetStore, served from daemon threads"""
+
+    def __init__(self, store, port=DEFAULT_PORT, address="0.0.0.0", udp_port=None):
+        self.store = store
+        self.httpd = ThreadingHTTPServer((address, int(port)), _CollectorHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.store = store
+        self.port = self.httpd.server_address[1]
+        self._threads = [threading.Thread(target=self.httpd.serve_forever, name="FleetCollectorHTTP", daemon=True)]
+
+        self.udp_sock = None
+        self.udp_port = None
+        self.udp_errors = 0
+        self._stopped = False
+        if udp_port is not None:
+            self.udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.udp_sock.bind((address, int(udp_port)))
+            # Room for bursts from many monitors while a batch is being stored
+            self.udp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+            # Closing the socket does not wake a blocked receive, so poll for stop()
+            self.udp_sock.settimeout(0.5)
+            self.udp_port = self.udp_sock.getsockname()[1]
+            self._threads.append(threading.Thread(target=self._serve_udp, name="FleetCollectorUDP", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _serve_udp(self):
+        """UDP thread body: one batch per datagram, stored together with the datagrams already waiting"""
+        buffer = bytearray(65536)
+        while not self._stopped:
+            try:
+                size = self.udp_sock.recv_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            rows = []
+            while True:
+                try:
+                    rows += decode_batch(buffer[:size])[1]
+                except ValueError:
+                    self.udp_errors += 1
+                if len(rows) >= UDP_MAX_ROWS:
+                    break
+                # Group commit: one transaction for everything received meanwhile. select()
+                # polls without blocking on every platform (Windows has no MSG_DONTWAIT)
+                try:
+                    if not select.select([self.udp_sock], [], [], 0)[0]:
+                        break
+                    size = self.udp_sock.recv_into(buffer)
+                except OSError:
+                    break
+            if rows:
+                # A batch that cannot be stored is counted and dropped, the listener keeps running
+                try:
+                    self.store.ingest(rows)
+                except (sqlite3.Error, OverflowError) as e:
+                    print(f"Error storing fleet events received over UDP: {e}")
+                    self.store.errors += 1
+
+    def stop(self):
+        """Stop the listeners and release the ports"""
+        self._stopped = True
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for thread in self._threads:
+            thread.join(5)
+        if self.udp_sock is not None:
+            self.udp_sock.close()
+
+
+def run_collector(db_path=DEFAULT_DB_PATH, port=DEFAULT_PORT, address="0.0.0.0", udp_port=None):
+    """Run the collector until SIGINT/SIGTERM, printing the counters every minute"""
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    store = FleetStore(db_path)
+    collector = FleetCollector(store, port, address, udp_port)
+    listening = f"http://{address}:{collector.port}/events"
+    if collector.udp_port is not None:
+        listening += f" and udp://{address}:{collector.udp_port}"
+    print(f"Collecting fleet events on {listening} into {db_path}", flush=True)
+    try:
+        while not stop.wait(60):
+            stats = store.stats()
+            print(f"{time.strftime('%Y/%m/%d %H:%M:%S')} - {stats['inserted']} events stored, "
+                  f"{stats['duplicates']} duplicates, {stats['batches']} batches", flush=True)
+    finally:
+        collector.stop()
+        store.close()
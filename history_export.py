@@ -0,0 +1,233 @@
+"""Streaming export of the event history and of the outages derived from it.
+
+Events are read with event_query, so memory use does not depend on the
+size of the log: rows are written in chunks of at most `chunk_rows`. A
+cursor saved next to the output records how far the export went (and the
+outages still open), so later runs with append=True only add what was
+logged since.
+"""
+import csv
+import datetime
+import json
+import os
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from event_query import query_events
+
+FORMATS = ("csv", "jsonl", "parquet")
+DATASETS = ("events", "outages")
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Columns of each dataset; times are given both as epoch milliseconds and as UTC ISO 8601
+COLUMNS = {
+    "events": ("timestamp_ms", "time", "event", "target", "duration_ms", "latency_ms"),
+    "outages": ("start_ms", "end_ms", "duration_ms", "start", "end", "target"),
+}
+
+
+def iso_utc(timestamp_ms):
+    """Format epoch milliseconds as a UTC ISO 8601 time"""
+    when = datetime.datetime.fromtimestamp(timestamp_ms / 1000, datetime.timezone.utc)
+    return when.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class ExportCursor:
+    """Position of an incremental export.
+
+    `timestamp_ms` is the time of the last exported event and `skip` the
+    number of events at that exact time already exported. `open_outages`
+    maps a target ("" for the main connection) to the start of an outage
+    that had not ended yet.
+    """
+
+    def __init__(self, timestamp_ms=None, skip=0, open_outages=None):
+        self.timestamp_ms = timestamp_ms
+        self.skip = skip
+        self.open_outages = open_outages or {}
+
+    @classmethod
+    def load(cls, path):
+        """Read a cursor file, return None if there is none"""
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(data.get("timestamp_ms"), data.get("skip", 0), data.get("open_outages"))
+
+    def save(self, path):
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"timestamp_ms": self.timestamp_ms, "skip": self.skip, "open_outages": self.open_outages}, f)
+        os.replace(temp_path, path)
+
+    def advance(self, events):
+        """Yield the events not exported yet, moving the cursor past each of them"""
+        resume_ms, already_exported = self.timestamp_ms, self.skip
+        for event in events:
+            if event.timestamp_ms == resume_ms and already_exported:
+                already_exported -= 1
+                continue
+            if event.timestamp_ms == self.timestamp_ms:
+                self.skip += 1
+            else:
+                self.timestamp_ms = event.timestamp_ms
+                self.skip = 1
+            yield event
+
+
+def event_rows(events, event_types=None):
+    """Rows of the events dataset"""
+    for event in events:
+        if event_types and event.event not in event_types:
+            continue
+        yield (event.timestamp_ms, iso_utc(event.timestamp_ms), event.event, event.target,
+               event.duration_ms, event.latency_ms)
+
+
+def outage_rows(events, open_outages):
+    """Rows of the outages dataset: DOWN/UP pairs per target, in the order they end.
+
+    `open_outages` holds the outages started but not ended, and is updated
+    in place so that it can be saved with the cursor.
+    """
+    for event in events:
+        key = event.target or ""
+        if event.event == "DOWN":
+            # A DOWN while already down keeps the start of the outage
+            open_outages.setdefault(key, event.timestamp_ms)
+        elif event.event == "UP" and key in open_outages:
+            start_ms = open_outages.pop(key)
+            end_ms = max(start_ms, event.timestamp_ms)
+            yield (start_ms, end_ms, end_ms - start_ms, iso_utc(start_ms), iso_utc(end_ms), event.target)
+
+
+class _CsvWriter:
+    def __init__(self, path, columns, append):
+        # Append without repeating the header
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if write_header:
+            self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _JsonlWriter:
+    def __init__(self, path, columns, append):
+        self.columns = columns
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, rows):
+        self._file.write("".join(json.dumps(dict(zip(self.columns, row))) + "\n" for row in rows))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    """One row group per chunk; a Parquet file cannot be appended to, so append runs write a new part file"""
+
+    def __init__(self, path, columns, append):
+        if pyarrow is None:
+            raise RuntimeError("The pyarrow package is required to export to Parquet")
+        self.columns = columns
+        self.path = path
+        self._writer = None
+        self._types = {
+            "timestamp_ms": pyarrow.int64(), "start_ms": pyarrow.int64(), "end_ms": pyarrow.int64(),
+            "duration_ms": pyarrow.int64(), "latency_ms": pyarrow.float64(),
+        }
+
+    def write(self, rows):
+        arrays = [
+            pyarrow.array(list(values), type=self._types.get(column, pyarrow.string()))
+            for column, values in zip(self.columns, zip(*rows))
+        ]
+        table = pyarrow.Table.from_arrays(arrays, names=list(self.columns))
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "jsonl": _JsonlWriter, "parquet": _ParquetWriter}
+
+
+def cursor_path(output):
+    """Path of the cursor of an export"""
+    if os.path.isdir(output):
+        return os.path.join(output, ".export_cursor.json")
+    return output + ".cursor"
+
+
+def _parquet_part_path(directory, cursor):
+    """New part file of a Parquet dataset directory, named after the position it starts from"""
+    return os.path.join(directory, f"part-{cursor.timestamp_ms or 0}-{cursor.skip}.parquet")
+
+
+def export_history(store, output, fmt="csv", dataset="events", start_ms=None, end_ms=None,
+                   event_types=None, target=None, append=False, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Export the events (or the outages) of a store to a file, return the number of rows written.
+
+    With append=True the export continues from the cursor saved by the
+    previous append run, if any, and saves the position reached for the
+    next one. For Parquet `output` is then a directory that receives one
+    part file per run.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset}")
+    if fmt == "parquet" and append:
+        os.makedirs(output, exist_ok=True)
+    cursor_file = cursor_path(output)
+    cursor = ExportCursor.load(cursor_file) if append else None
+    if cursor is None:
+        cursor = ExportCursor(start_ms)
+
+    path = _parquet_part_path(output, cursor) if fmt == "parquet" and append else output
+    # The cursor restarts from the last exported event, advance() skips what was already written
+    events = cursor.advance(query_events(store, cursor.timestamp_ms, end_ms, None, target))
+    if dataset == "events":
+        rows = event_rows(events, event_types)
+    else:
+        rows = outage_rows(events, cursor.open_outages)
+
+    writer = _WRITERS[fmt](path, COLUMNS[dataset], append)
+    written = 0
+    try:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                writer.write(chunk)
+                written += len(chunk)
+                chunk = []
+                if append and fmt != "parquet":
+                    # Rows are on disk, a crash from here on does not export them twice
+                    cursor.save(cursor_file)
+        if chunk:
+            writer.write(chunk)
+            written += len(chunk)
+    finally:
+        writer.close()
+    if append:
+        if fmt == "parquet" and not written and os.path.exists(path):
+            os.remove(path)
+        cursor.save(cursor_file)
+    return written
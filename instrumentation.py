@@ -0,0 +1,192 @@
+"""Opt-in timing instrumentation of the hot paths and event loop stall detection.
+
+Functions decorated with @timed("name") record their duration in a
+histogram while instrumentation is enabled; when it is disabled (the
+default) the wrapper only checks a flag. Heartbeats measure how late a
+periodic callback runs, i.e. how long the Tk main loop or the probe loop
+was blocked.
+"""
+import asyncio
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Upper bounds (ms) of the duration histogram buckets, the last bucket is open ended
+BUCKET_BOUNDS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000, 5000)
+
+
+class Histogram:
+    """Duration histogram with count, total and maximum (milliseconds)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, duration_ms):
+        with self._lock:
+            self.counts[bisect_left(BUCKET_BOUNDS_MS, duration_ms)] += 1
+            self.count += 1
+            self.total_ms += duration_ms
+            if duration_ms > self.max_ms:
+                self.max_ms = duration_ms
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the given percentile, None if empty"""
+        with self._lock:
+            counts, count, max_ms = list(self.counts), self.count, self.max_ms
+        if not count:
+            return None
+        rank = pct / 100 * count
+        seen = 0
+        for bound, bucket in zip(BUCKET_BOUNDS_MS, counts):
+            seen += bucket
+            if seen >= rank:
+                return min(bound, max_ms)
+        return max_ms
+
+    def snapshot(self):
+        with self._lock:
+            count, total_ms, max_ms = self.count, self.total_ms, self.max_ms
+        return {
+            "count": count,
+            "total_ms": total_ms,
+            "mean_ms": total_ms / count if count else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": max_ms,
+        }
+
+
+class Instrumentation:
+    """Registry of the histograms and of the detected stalls"""
+
+    def __init__(self):
+        self.enabled = False
+        self.stall_threshold_ms = 200.0
+        self.histograms = {}
+        # Most recent stalls: (wall clock time, loop name, lag in ms)
+        self.stalls = deque(maxlen=50)
+        self.stall_count = 0
+        self._lock = threading.Lock()
+
+    def enable(self, stall_threshold_ms=200.0):
+        self.stall_threshold_ms = float(stall_threshold_ms)
+        self.enabled = True
+
+    def histogram(self, name):
+        """Return the histogram of a metric, creating it on first use"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(name))
+        return histogram
+
+    def observe(self, name, duration_ms):
+        if self.enabled:
+            self.histogram(name).observe(duration_ms)
+
+    def record_stall(self, loop_name, lag_ms):
+        with self._lock:
+            self.stall_count += 1
+            self.stalls.append((time.time(), loop_name, lag_ms))
+        print(f"{time.strftime('%Y/%m/%d %H:%M:%S')} - {loop_name} blocked for {lag_ms:.0f} ms")
+
+    def snapshot(self):
+        """Return every metric and the recent stalls as a JSON-serializable dict.
+
+        This is the only safe way to read the registry from another thread:
+        @timed adds histograms and the loops add stalls while it is read.
+        """
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            stalls = list(self.stalls)
+            stall_count = self.stall_count
+        return {
+            "enabled": self.enabled,
+            "stall_threshold_ms": self.stall_threshold_ms,
+            "stall_count": stall_count,
+            "recent_stalls": [
+                {"time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(when)), "loop": loop, "lag_ms": lag}
+                for when, loop, lag in stalls
+            ],
+            "metrics": {name: histogram.snapshot() for name, histogram in histograms},
+        }
+
+    def dump(self, path):
+        """Write the snapshot to a JSON file"""
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+# Process-wide registry
+INSTRUMENTATION = Instrumentation()
+
+
+def timed(name):
+    """Decorator recording the duration of a function (or coroutine) under `name`"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not INSTRUMENTATION.enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    INSTRUMENTATION.histogram(name).observe((time.perf_counter_ns() - start) / 1e6)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not INSTRUMENTATION.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                INSTRUMENTATION.histogram(name).observe((time.perf_counter_ns() - start) / 1e6)
+        return wrapper
+    return decorator
+
+
+class Heartbeat:
+    """Periodic callback measuring how late it runs on an event loop.
+
+    `schedule(delay_s, callback)` must arm a callback on the watched loop,
+    e.g. root.after for Tk or loop.call_later for asyncio. The lateness of
+    each beat is recorded as "<name>.lag" and beats later than the stall
+    threshold are reported as stalls.
+    """
+
+    def __init__(self, name, schedule, interval_s=0.1):
+        self.name = name
+        self.schedule = schedule
+        self.interval_s = interval_s
+        self._expected = None
+        self._stopped = False
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval_s
+        self.schedule(self.interval_s, self._beat)
+
+    def stop(self):
+        self._stopped = True
+
+    def _beat(self):
+        if self._stopped:
+            return
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - self._expected) * 1000)
+        INSTRUMENTATION.observe(f"{self.name}.lag", lag_ms)
+        if lag_ms >= INSTRUMENTATION.stall_threshold_ms:
+            INSTRUMENTATION.record_stall(self.name, lag_ms)
+        self._expected = now + self.interval_s
+        self.schedule(self.interval_s, self._beat)
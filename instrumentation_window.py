@@ -0,0 +1,72 @@
+import tkinter as tk
+from tkinter import ttk
+
+from instrumentation import INSTRUMENTATION
+
+# Refresh interval of the table (milliseconds)
+REFRESH_MS = 1000
+
+
+class InstrumentationWindow(tk.Toplevel):
+    """Live table of the instrumented hot paths and of the recent event loop stalls"""
+
+    def __init__(self, parent, localization, dump):
+        super().__init__(parent)
+        self.localization = localization
+        # Callback writing the dump file, returns its path (or None on error)
+        self.dump = dump
+        self.title(localization.get_string("instrumentation_title"))
+        self.geometry("640x420")
+
+        frame = ttk.Frame(self, padding="10 10 10 10")
+        frame.pack(expand=True, fill=tk.BOTH)
+
+        # Timings are technical values, the column names are not translated
+        columns = ("count", "mean", "p50", "p95", "max")
+        self._table = ttk.Treeview(frame, columns=columns, show="tree headings", height=12)
+        self._table.heading("#0", text="name")
+        self._table.column("#0", width=200, anchor=tk.W)
+        for column in columns:
+            self._table.heading(column, text=column if column == "count" else f"{column} (ms)")
+            self._table.column(column, width=80, anchor=tk.E)
+        self._table.pack(expand=True, fill=tk.BOTH)
+
+        self._stalls_label = ttk.Label(frame, text="", anchor=tk.W, justify=tk.LEFT)
+        self._stalls_label.pack(fill=tk.X, pady=(5, 0))
+
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(button_frame, text=localization.get_string("instrumentation_dump"),
+                   command=self.write_dump).pack(side=tk.LEFT)
+        self._dump_label = ttk.Label(button_frame, text="")
+        self._dump_label.pack(side=tk.LEFT, padx=10)
+
+        self.refresh()
+
+    def refresh(self):
+        """Update the table from the registry, then re-arm"""
+        if not self.winfo_exists():
+            return
+        instrumentation = INSTRUMENTATION.snapshot()
+        for name, snapshot in instrumentation["metrics"].items():
+            values = (snapshot["count"],) + tuple(
+                f"{snapshot[key]:.2f}" if snapshot[key] is not None else "-"
+                for key in ("mean_ms", "p50_ms", "p95_ms", "max_ms")
+            )
+            if self._table.exists(name):
+                self._table.item(name, values=values)
+            else:
+                self._table.insert("", tk.END, iid=name, text=name, values=values)
+
+        text = self.localization.get_string("instrumentation_stalls").format(instrumentation["stall_count"])
+        for stall in reversed(instrumentation["recent_stalls"][-3:]):
+            # Only the time of day of "YYYY-MM-DD HH:MM:SS"
+            text += f"\n{stall['time'].split()[1]}  {stall['loop']}  {stall['lag_ms']:.0f} ms"
+        self._stalls_label.config(text=text)
+        self.after(REFRESH_MS, self.refresh)
+
+    def write_dump(self):
+        path = self.dump()
+        if path:
+            self._dump_label.config(text=path)
+
@@ -0,0 +1,64 @@
+from array import array
+from bisect import bisect_left, insort
+
+
+class LatencyWindow:
+    """Rolling window of round-trip latency samples (milliseconds).
+
+    Samples live in a fixed-size ring buffer backed by array('d'). A second
+    array keeps the same samples in sorted order and is updated with one
+    insertion and one removal per sample, so percentiles are read directly
+    by rank without rescanning the history.
+    """
+
+    def __init__(self, size=60, degraded_threshold_ms=250.0):
+        if size < 1:
+            raise ValueError("Window size must be at least 1")
+        self.size = int(size)
+        self.degraded_threshold_ms = float(degraded_threshold_ms)
+        self._ring = array('d', bytes(8 * self.size))
+        self._sorted = array('d')
+        self._next = 0
+        self.count = 0
+        self.total_samples = 0
+
+    def add(self, latency_ms):
+        """Add a sample, evicting the oldest one when the window is full"""
+        latency_ms = float(latency_ms)
+        if self.count == self.size:
+            evicted = self._ring[self._next]
+            del self._sorted[bisect_left(self._sorted, evicted)]
+        else:
+            self.count += 1
+        self._ring[self._next] = latency_ms
+        self._next = (self._next + 1) % self.size
+        insort(self._sorted, latency_ms)
+        self.total_samples += 1
+
+    def percentile(self, pct):
+        """Return the nearest-rank percentile of the window, None if it is empty"""
+        if not self.count:
+            return None
+        rank = max(1, -(-pct * self.count // 100))  # ceil(pct / 100 * count)
+        return self._sorted[int(rank) - 1]
+
+    def latest(self):
+        """Return the most recent sample, None if the window is empty"""
+        if not self.count:
+            return None
+        return self._ring[(self._next - 1) % self.size]
+
+    def summary(self):
+        """Return the (p50, p95, p99) tuple of the window"""
+        return self.percentile(50), self.percentile(95), self.percentile(99)
+
+    def is_degraded(self):
+        """True if the p95 latency is above the degraded threshold"""
+        p95 = self.percentile(95)
+        return p95 is not None and p95 > self.degraded_threshold_ms
+
+    def clear(self):
+        """Drop all samples"""
+        self._sorted = array('d')
+        self._next = 0
+        self.count = 0
@@ -0,0 +1,131 @@
+"""Passive detection of local network changes through Linux rtnetlink.
+
+The kernel multicasts a message when an interface goes up or down, when an
+address is added or removed and when a route changes. Listening to them
+costs nothing while the network is stable and reveals a pulled cable or a
+lost default route immediately, instead of at the next polling tick.
+"""
+import errno
+import socket
+import struct
+import sys
+import threading
+import time
+
+# rtnetlink multicast groups (linux/rtnetlink.h)
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV6_IFADDR = 0x100
+RTMGRP_IPV6_ROUTE = 0x400
+
+# Message types
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_NEWROUTE = 24
+RTM_DELROUTE = 25
+
+# struct nlmsghdr: length, type, flags, sequence, port id
+NLMSG_HEADER = struct.Struct("=IHHII")
+
+_CHANGE_KINDS = {
+    RTM_NEWLINK: "link", RTM_DELLINK: "link",
+    RTM_NEWADDR: "address", RTM_DELADDR: "address",
+    RTM_NEWROUTE: "default route", RTM_DELROUTE: "default route",
+}
+
+
+def is_supported():
+    """Whether rtnetlink can be used on this platform"""
+    return sys.platform.startswith("linux") and hasattr(socket, "AF_NETLINK")
+
+
+def parse_changes(data):
+    """Return the kinds of relevant changes ("link", "address", "default route") in a netlink datagram"""
+    changes = set()
+    offset = 0
+    while offset + NLMSG_HEADER.size <= len(data):
+        length, msg_type, _, _, _ = NLMSG_HEADER.unpack_from(data, offset)
+        if length < NLMSG_HEADER.size:
+            break
+        kind = _CHANGE_KINDS.get(msg_type)
+        if kind == "default route":
+            # struct rtmsg starts with family, dst_len: only the default route (dst_len 0) matters
+            if offset + NLMSG_HEADER.size + 2 <= len(data) and data[offset + NLMSG_HEADER.size + 1] == 0:
+                changes.add(kind)
+        elif kind is not None:
+            changes.add(kind)
+        # Messages are aligned to 4 bytes
+        offset += (length + 3) & ~3
+    return changes
+
+
+class LinkWatcher:
+    """Call a function when a network interface, address or default route changes.
+
+    Messages are read on a daemon thread. A change usually comes as a burst
+    (a pulled cable drops the link, its addresses and its routes), so the
+    callback is called once, `debounce` seconds after the first message of
+    the burst, with the set of change kinds seen. It runs on the watcher
+    thread and must be thread-safe.
+    """
+
+    def __init__(self, on_change, debounce=0.2):
+        self.on_change = on_change
+        self.debounce = debounce
+        self._sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        try:
+            self._sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV4_ROUTE
+                             | RTMGRP_IPV6_IFADDR | RTMGRP_IPV6_ROUTE))
+        except OSError:
+            self._sock.close()
+            raise
+        # Reused for every datagram
+        self._buffer = bytearray(65536)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="LinkWatcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Watcher thread body"""
+        pending = set()
+        deadline = None
+        view = memoryview(self._buffer)
+        while not self._stopped:
+            # Wake up periodically to notice stop(), or when a burst is due
+            self._sock.settimeout(0.5 if deadline is None else max(0.001, deadline - time.monotonic()))
+            try:
+                size = self._sock.recv_into(self._buffer)
+                changes = parse_changes(view[:size])
+            except socket.timeout:
+                changes = set()
+            except OSError as e:
+                if self._stopped:
+                    return
+                if e.errno == errno.ENOBUFS:
+                    # The socket buffer overflowed, messages were lost but something changed
+                    changes = {"link"}
+                else:
+                    print(f"Error reading network change notifications: {e}")
+                    return
+            if changes:
+                if deadline is None:
+                    deadline = time.monotonic() + self.debounce
+                pending |= changes
+            if deadline is not None and time.monotonic() >= deadline:
+                try:
+                    self.on_change(pending)
+                except Exception as e:
+                    print(f"Error handling network change: {e}")
+                pending = set()
+                deadline = None
+
+    def stop(self, timeout=2.0):
+        """Stop the watcher thread and close the socket"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._thread.join(timeout)
+        self._sock.close()
@@ -4,7 +4,10 @@ import os
 import sys
 import tkinter.messagebox as messagebox
 
+from instrumentation import timed
+
 class Localization:
+    @timed("localization.init")
     def __init__(self):
         
         # Determine the base path based on execution mode (script or executable)
@@ -19,16 +22,22 @@ class Localization:
         self.translations = {}
         self.current_language = "en"  # Default language
         self.available_languages = []
+        self._loaded_languages = set()  # Languages whose file has been loaded
         
         # Discover available languages from locales directory
         self._discover_available_languages()
         
-        # Load all available language files
+        # Load embedded strings and create the default language files
         self._load_languages()
         
         # Set initial language based on system settings
         self.set_language_from_system()
-    
+
+        # Only the active language and the English fallback are parsed at startup,
+        # the other languages are loaded on first use
+        self._ensure_loaded("en")
+        self._ensure_loaded(self.current_language)
+
     def _discover_available_languages(self):
         """Discover available languages from embedded resources or locales directory"""
         # Default languages that are always available
@@ -56,7 +65,7 @@ class Localization:
             messagebox.showerror("Error", error_msg) # Show error in GUI
     
     def _load_languages(self):
-        """Load all available language files from embedded resources or locales directory"""
+        """Load embedded language data and create the default language files if needed"""
         # Load embedded language data first
         self._load_embedded_languages()
         
@@ -74,19 +83,23 @@ class Localization:
                     elif lang == "it":
                         self._create_italian_file(lang_file)
         
-        # For both script and frozen executable, load language files if they exist
-        if os.path.exists(self._locales_dir):
-            # Load each language file (will override embedded translations if exists)
-            for lang in self.available_languages:
-                lang_file = os.path.join(self._locales_dir, f"{lang}.json")
-                if os.path.exists(lang_file):
-                    try:
-                        with open(lang_file, 'r', encoding='utf-8') as f:
-                            self.translations[lang] = json.load(f)
-                    except Exception as e:
-                        error_msg = f"Error loading language file {lang_file}: {e}"
-                        print(error_msg)
-                        messagebox.showerror("Error", error_msg) # Show error in GUI
+    @timed("localization.load")
+    def _ensure_loaded(self, lang):
+        """Load a language file the first time the language is needed"""
+        if lang in self._loaded_languages or lang not in self.available_languages:
+            return
+        self._loaded_languages.add(lang)
+        lang_file = os.path.join(self._locales_dir, f"{lang}.json")
+        if not os.path.exists(lang_file):
+            return
+        try:
+            # Language file overrides embedded translations if exists
+            with open(lang_file, 'r', encoding='utf-8') as f:
+                self.translations[lang] = json.load(f)
+        except Exception as e:
+            error_msg = f"Error loading language file {lang_file}: {e}"
+            print(error_msg)
+            messagebox.showerror("Error", error_msg) # Show error in GUI
     
     def _load_embedded_languages(self):
         """Load embedded language data"""
@@ -111,6 +124,39 @@ class Localization:
             "delete_log_confirm": "Are you sure you want to delete the log file?",
             "delete_log_success": "Log file deleted successfully",
             "delete_log_error": "Error deleting log file: {0}",
+            "connected_degraded": "Connected (slow connection)",
+            "latency_summary": "Latency p50 {0} ms · p95 {1} ms · p99 {2} ms",
+            "statistics_tooltip": "Show availability statistics",
+            "statistics_title": "Availability statistics",
+            "stat_availability": "Availability",
+            "stat_outages": "Outages",
+            "stat_total_downtime": "Total downtime",
+            "stat_longest_outage": "Longest outage",
+            "stat_mtbf": "Mean time between failures",
+            "stat_mttr": "Mean time to recovery",
+            "stat_durations": "Outage durations",
+            "stat_period": "Period",
+            "stat_day": "Daily",
+            "stat_week": "Weekly",
+            "stat_month": "Monthly",
+            "targets_tooltip": "Show monitored targets",
+            "targets_title": "Monitored targets",
+            "target_name": "Target",
+            "target_status": "Status",
+            "target_since": "Since",
+            "target_latency": "p95 latency",
+            "target_up": "Up",
+            "target_down": "Down",
+            "target_slow": "Slow",
+            "timeline_tooltip": "Show outage and latency timeline",
+            "timeline_title": "Timeline",
+            "timeline_hour": "Hour",
+            "timeline_day": "Day",
+            "timeline_week": "Week",
+            "timeline_month": "Month",
+            "instrumentation_title": "Instrumentation",
+            "instrumentation_dump": "Write dump",
+            "instrumentation_stalls": "Event loop stalls: {}",
             # Error messages
             "error_scanning_locales_dir": "Error scanning locales directory: {0}",
             "error_loading_language_file": "Error loading language file {0}: {1}",
@@ -138,6 +184,39 @@ class Localization:
             "delete_log_confirm": "Sei sicuro di voler eliminare il file di log?",
             "delete_log_success": "File di log eliminato con successo",
             "delete_log_error": "Errore durante l'eliminazione del file di log: {0}",
+            "connected_degraded": "Connesso (connessione lenta)",
+            "latency_summary": "Latenza p50 {0} ms · p95 {1} ms · p99 {2} ms",
+            "statistics_tooltip": "Mostra statistiche di disponibilità",
+            "statistics_title": "Statistiche di disponibilità",
+            "stat_availability": "Disponibilità",
+            "stat_outages": "Interruzioni",
+            "stat_total_downtime": "Tempo di disconnessione totale",
+            "stat_longest_outage": "Interruzione più lunga",
+            "stat_mtbf": "Tempo medio tra i guasti",
+            "stat_mttr": "Tempo medio di ripristino",
+            "stat_durations": "Durata delle interruzioni",
+            "stat_period": "Periodo",
+            "stat_day": "Giornaliero",
+            "stat_week": "Settimanale",
+            "stat_month": "Mensile",
+            "targets_tooltip": "Mostra le destinazioni monitorate",
+            "targets_title": "Destinazioni monitorate",
+            "target_name": "Destinazione",
+            "target_status": "Stato",
+            "target_since": "Dal",
+            "target_latency": "Latenza p95",
+            "target_up": "Attiva",
+            "target_down": "Non raggiungibile",
+            "target_slow": "Lenta",
+            "timeline_tooltip": "Mostra la cronologia di interruzioni e latenza",
+            "timeline_title": "Cronologia",
+            "timeline_hour": "Ora",
+            "timeline_day": "Giorno",
+            "timeline_week": "Settimana",
+            "timeline_month": "Mese",
+            "instrumentation_title": "Strumentazione",
+            "instrumentation_dump": "Scrivi dump",
+            "instrumentation_stalls": "Blocchi del ciclo eventi: {}",
             # Error messages
             "error_scanning_locales_dir": "Errore durante la scansione della directory delle lingue: {0}",
             "error_loading_language_file": "Errore durante il caricamento del file di lingua {0}: {1}",
@@ -154,9 +233,11 @@ class Localization:
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(self.translations["it"], f, ensure_ascii=False, indent=4)
     
+    @timed("localization.set_language")
     def set_language(self, lang_code):
         """Set the current language"""
         if lang_code in self.available_languages:
+            self._ensure_loaded(lang_code)
             self.current_language = lang_code
             return True
         return False
@@ -186,6 +267,7 @@ class Localization:
     def get_string(self, key, lang_code=None):
         """Get a localized string by key"""
         language = lang_code if lang_code else self.current_language
+        self._ensure_loaded(language)
         try:
             return self.translations[language].get(key, key)
         except:
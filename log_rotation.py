@@ -0,0 +1,139 @@
+import datetime
+import gzip
+import io
+import os
+import re
+import shutil
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# File suffix added to rotated segments for each compression method
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+# Timestamp embedded in segment names, sorts in chronological order
+SEGMENT_TIME_FORMAT = "%Y%m%d-%H%M%S"
+
+
+def segment_pattern(log_path):
+    """Regular expression matching the rotated segments of a log file"""
+    base, ext = os.path.splitext(os.path.basename(log_path))
+    return re.compile(rf"^{re.escape(base)}\.(\d{{8}}-\d{{6}})(?:-(\d+))?{re.escape(ext)}(\.gz|\.zst)?$")
+
+
+def list_segments(log_path):
+    """Return the paths of the rotated segments of a log, oldest first"""
+    directory = os.path.dirname(log_path) or "."
+    if not os.path.isdir(directory):
+        return []
+    pattern = segment_pattern(log_path)
+    segments = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            # Segments rotated within the same second carry an increasing counter
+            segments.append((match.group(1), int(match.group(2) or 0), os.path.join(directory, name)))
+    return [path for _, _, path in sorted(segments)]
+
+
+def segment_time(path):
+    """Return the rotation time embedded in a segment name (local datetime), or None"""
+    name = os.path.basename(path)
+    match = re.search(r"\.(\d{8}-\d{6})(?:-\d+)?\.[^.]*(?:\.gz|\.zst)?$", name)
+    if not match:
+        return None
+    return datetime.datetime.strptime(match.group(1), SEGMENT_TIME_FORMAT)
+
+
+def open_segment(path):
+    """Open a segment for streaming text reads, decompressing on the fly"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"The zstandard package is required to read {path}")
+        raw = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return open(path, "r")
+
+
+class LogRotator:
+    """Rotate a text log by size and/or calendar month.
+
+    The active file is renamed to "<name>.<YYYYMMDD-HHMMSS><ext>" and then
+    compressed with gzip (or zstd when the zstandard package is installed).
+    """
+
+    def __init__(self, log_path, max_bytes=0, monthly=False, compression="gzip"):
+        self.log_path = log_path
+        self.max_bytes = int(max_bytes or 0)
+        self.monthly = monthly
+        if compression == "zstd" and zstandard is None:
+            print("zstandard package not installed, compressing log segments with gzip")
+            compression = "gzip"
+        if compression not in COMPRESSION_SUFFIXES:
+            print(f"Unknown log compression '{compression}', using gzip")
+            compression = "gzip"
+        self.compression = compression
+        self._active_month = None
+
+    @property
+    def enabled(self):
+        return bool(self.max_bytes) or self.monthly
+
+    def should_rotate(self, now=None):
+        """True if the active file must be rotated before the next append"""
+        if not self.enabled or not os.path.exists(self.log_path):
+            return False
+        size = os.path.getsize(self.log_path)
+        if not size:
+            return False
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        if self.monthly:
+            now = now or datetime.datetime.now()
+            if self._active_month is None:
+                # The log was last written in the month of its modification time
+                mtime = datetime.datetime.fromtimestamp(os.path.getmtime(self.log_path))
+                self._active_month = (mtime.year, mtime.month)
+            return self._active_month != (now.year, now.month)
+        return False
+
+    def note_append(self, now=None):
+        """Remember the month of the latest write to the active file"""
+        now = now or datetime.datetime.now()
+        self._active_month = (now.year, now.month)
+
+    def rotate(self, now=None):
+        """Move the active file to a new compressed segment, return its path"""
+        now = now or datetime.datetime.now()
+        base, ext = os.path.splitext(self.log_path)
+        stamp = now.strftime(SEGMENT_TIME_FORMAT)
+        segment = f"{base}.{stamp}{ext}"
+        counter = 1
+        while any(os.path.exists(segment + suffix) for suffix in COMPRESSION_SUFFIXES.values()):
+            segment = f"{base}.{stamp}-{counter}{ext}"
+            counter += 1
+        os.replace(self.log_path, segment)
+        self._active_month = None
+
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        if not suffix:
+            return segment
+        try:
+            with open(segment, "rb") as src, open(segment + suffix, "wb") as dst:
+                if self.compression == "zstd":
+                    zstandard.ZstdCompressor().copy_stream(src, dst)
+                else:
+                    with gzip.GzipFile(fileobj=dst, mode="wb") as gz:
+                        shutil.copyfileobj(src, gz)
+        except Exception as e:
+            # Keep the uncompressed segment rather than losing history
+            print(f"Error compressing log segment {segment}: {e}")
+            if os.path.exists(segment + suffix):
+                os.remove(segment + suffix)
+            return segment
+        os.remove(segment)
+        return segment + suffix
@@ -0,0 +1,223 @@
+import queue
+import threading
+import time
+
+from instrumentation import timed
+from latency import LatencyWindow
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+# Queue markers handled by the writer thread
+_STOP = object()
+
+
+class LogWriter:
+    """Write events to their stores from a dedicated thread.
+
+    Callers only enqueue events, so logging never blocks the GUI thread on
+    disk I/O. The writer drains everything queued so far and writes it with
+    one append_many() per store (group commit). Durability is set by the
+    fsync policy: "always" syncs after every batch, "interval" at most every
+    fsync_interval_ms, "never" leaves it to the operating system. Pending
+    events are written and synced when the writer is closed.
+    """
+
+    def __init__(self, fsync="interval", fsync_interval_ms=1000, max_queue=10000, max_batch=1000):
+        if fsync not in FSYNC_POLICIES:
+            print(f"Unknown fsync policy '{fsync}', using 'interval'")
+            fsync = "interval"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue(max_queue)
+        self._dirty = set()
+        self._last_sync = time.monotonic()
+        self._closed = False
+        # Set once the stop marker is queued, the thread may still be draining the events before it
+        self._stop_requested = False
+        # True while events are being dropped because the queue is full
+        self._overflowing = False
+
+        # Counters, read by the metrics endpoint and the benchmarks
+        self.events_written = 0
+        self.batches_written = 0
+        self.syncs = 0
+        self.dropped = 0
+        self.errors = 0
+        self.write_latency = LatencyWindow(256)
+        self.write_seconds_total = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+
+    @timed("log.submit")
+    def submit(self, store, event):
+        """Queue an event to be appended to a store"""
+        if not self._closed and self._stop_requested and not self._thread.is_alive():
+            # A close() that timed out has finished in the meantime
+            self._finish_close()
+        if self._closed:
+            # Late events (e.g. during shutdown) are written synchronously
+            store.append_many([event])
+            return
+        try:
+            # Never blocks: this runs on the GUI thread, which must not wait for a stalled disk
+            self._queue.put_nowait((store, event))
+            self._overflowing = False
+        except queue.Full:
+            self.dropped += 1
+            if not self._overflowing:
+                # Reported once per overflow, the dropped counter keeps the total
+                print(f"Log queue full, dropping events (first: {event})")
+                self._overflowing = True
+
+    def flush(self, timeout=5.0):
+        """Wait until every event queued so far is written and synced, return False on timeout"""
+        if not self._closed and self._stop_requested and not self._thread.is_alive():
+            self._finish_close()
+        if self._closed:
+            return True
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            # Bounded like the wait itself: with a full queue and a stalled disk this would block forever
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(max(0.0, deadline - time.monotonic()))
+
+    def close(self, timeout=5.0):
+        """Write the pending events, sync and stop the writer thread; return False if it did not finish in time"""
+        if self._closed:
+            return True
+        deadline = time.monotonic() + timeout
+        if not self._stop_requested:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                self._stop_requested = True
+            except queue.Full:
+                print("Log writer not closed: the queue stayed full")
+                return False
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        if self._thread.is_alive():
+            # Still draining: events keep going through the queue, writing them from here
+            # as well would interleave two writers on the same store
+            print("Log writer still writing pending events, not closed yet")
+            return False
+        self._finish_close()
+        return True
+
+    def _finish_close(self):
+        """Once the writer thread has stopped, write what was queued after the stop marker"""
+        self._closed = True
+        leftovers = {}
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not _STOP:
+                store, event = item
+                leftovers.setdefault(store, []).append(event)
+        for store, events in leftovers.items():
+            self._write(store, events)
+        self._sync_dirty()
+
+    def queue_depth(self):
+        """Number of events waiting to be written"""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Return the writer counters as a dict"""
+        return {
+            "queue_depth": self.queue_depth(),
+            "events_written": self.events_written,
+            "batches_written": self.batches_written,
+            "syncs": self.syncs,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "write_seconds_total": self.write_seconds_total,
+            "write_ms_p50": self.write_latency.percentile(50),
+            "write_ms_p95": self.write_latency.percentile(95),
+            "write_ms_max": self.write_latency.percentile(100),
+        }
+
+    def _next_timeout(self):
+        """How long the writer may wait for events before a pending interval sync is due"""
+        if self.fsync != "interval" or not self._dirty:
+            return None
+        return max(0.0, self._last_sync + self.fsync_interval - time.monotonic())
+
+    def _run(self):
+        """Writer thread body"""
+        while True:
+            try:
+                item = self._queue.get(timeout=self._next_timeout())
+            except queue.Empty:
+                self._sync_dirty()
+                continue
+            # Group commit: take whatever else is already waiting
+            items = [item]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batches = {}
+            waiters = []
+            stop = False
+            for item in items:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    store, event = item
+                    batches.setdefault(store, []).append(event)
+
+            for store, events in batches.items():
+                self._write(store, events)
+
+            if self.fsync == "always" or waiters or stop:
+                self._sync_dirty()
+            elif self.fsync == "interval" and time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync_dirty()
+
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+
+    @timed("log.write")
+    def _write(self, store, events):
+        start = time.perf_counter()
+        try:
+            store.append_many(events)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error writing {len(events)} events to {store.path}: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        self.write_latency.add(elapsed * 1000)
+        self.write_seconds_total += elapsed
+        self.events_written += len(events)
+        self.batches_written += 1
+        self._dirty.add(store)
+
+    @timed("log.sync")
+    def _sync_dirty(self):
+        """Flush the stores written since the last sync to disk, according to the policy"""
+        if self.fsync != "never":
+            for store in self._dirty:
+                try:
+                    store.sync()
+                    self.syncs += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error syncing {store.path}: {e}")
+        self._dirty.clear()
+        self._last_sync = time.monotonic()
+
@@ -0,0 +1,199 @@
+import threading
+import time
+from bisect import bisect_left
+
+from instrumentation import INSTRUMENTATION
+
+# Upper bounds (seconds) of the probe latency histogram buckets, +Inf is implicit
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MonitorMetrics:
+    """Monitor metrics, updated incrementally by MonitorCore.
+
+    Every update is O(1) and a scrape only copies the current values under a
+    lock, so exporting never reads the event log. Counters start at zero
+    with the process, as usual for Prometheus counters.
+    """
+
+    def __init__(self, log_writer=None):
+        self._lock = threading.Lock()
+        # Optional LogWriter whose counters are exported as well
+        self.log_writer = log_writer
+        self.connected = None
+        self.checks = {"up": 0, "down": 0}
+        self.outages = 0
+        self.downtime_s = 0.0
+        self.down_since = None
+        self.last_down_s = None
+        self.last_up_s = None
+        # probe -> [bucket counts..., +Inf count], sum of latencies (s)
+        self.latency_buckets = {}
+        self.latency_sum = {}
+        # Throughput tests by outcome, bytes they received and last measured goodput
+        self.throughput_tests = {"ok": 0, "failed": 0}
+        self.throughput_bytes = 0
+        self.goodput_bps = None
+
+    def set_last_events(self, last_down_s, last_up_s):
+        """Seed the last transition timestamps (epoch seconds) from the event log"""
+        with self._lock:
+            self.last_down_s = last_down_s
+            self.last_up_s = last_up_s
+
+    def observe_check(self, result):
+        """Account for one connection check"""
+        with self._lock:
+            self.checks["up" if result.connected else "down"] += 1
+            if result.latency_ms is not None:
+                probe = result.probe or "unknown"
+                latency_s = result.latency_ms / 1000
+                buckets = self.latency_buckets.get(probe)
+                if buckets is None:
+                    buckets = self.latency_buckets[probe] = [0] * (len(LATENCY_BUCKETS_S) + 1)
+                    self.latency_sum[probe] = 0.0
+                # Non-cumulative counts, accumulated at render time
+                buckets[bisect_left(LATENCY_BUCKETS_S, latency_s)] += 1
+                self.latency_sum[probe] += latency_s
+
+    def observe_throughput(self, result):
+        """Account for one throughput test"""
+        with self._lock:
+            self.throughput_tests["failed" if result.goodput_bps is None else "ok"] += 1
+            self.throughput_bytes += result.bytes
+            if result.goodput_bps is not None:
+                self.goodput_bps = result.goodput_bps
+
+    def observe_state(self, connected, when_s=None):
+        """Track the connection state and the downtime of the open outage"""
+        when_s = time.time() if when_s is None else when_s
+        with self._lock:
+            if connected and self.down_since is not None:
+                self.downtime_s += max(0.0, when_s - self.down_since)
+                self.down_since = None
+            elif not connected and self.down_since is None:
+                self.down_since = when_s
+            self.connected = connected
+
+    def observe_event(self, event_type, when_s=None):
+        """Account for a logged DOWN/UP transition"""
+        when_s = time.time() if when_s is None else when_s
+        with self._lock:
+            if event_type == "DOWN":
+                self.outages += 1
+                self.last_down_s = when_s
+            elif event_type == "UP":
+                self.last_up_s = when_s
+
+    def render(self, openmetrics=False):
+        """Return a snapshot in the Prometheus text format (or OpenMetrics)"""
+        now_s = time.time()
+        with self._lock:
+            connected = self.connected
+            checks = dict(self.checks)
+            outages = self.outages
+            downtime_s = self.downtime_s
+            if self.down_since is not None:
+                downtime_s += max(0.0, now_s - self.down_since)
+            last_down_s = self.last_down_s
+            last_up_s = self.last_up_s
+            latency_buckets = {probe: list(counts) for probe, counts in self.latency_buckets.items()}
+            latency_sum = dict(self.latency_sum)
+            throughput_tests = dict(self.throughput_tests)
+            throughput_bytes = self.throughput_bytes
+            goodput_bps = self.goodput_bps
+
+        lines = []
+
+        def family(name, kind, help_text):
+            # OpenMetrics names a counter family without its "_total" suffix
+            if openmetrics and kind == "counter":
+                name = name[:-len("_total")]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def sample(name, value, labels=None):
+            label_text = ""
+            if labels:
+                label_text = "{" + ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels.items()) + "}"
+            lines.append(f"{name}{label_text} {_format_value(value)}")
+
+        family("internet_monitor_up", "gauge", "Whether the Internet connection is up (1) or down (0).")
+        if connected is not None:
+            sample("internet_monitor_up", int(connected))
+
+        family("internet_monitor_checks_total", "counter", "Connection checks by outcome.")
+        for outcome, count in checks.items():
+            sample("internet_monitor_checks_total", count, {"result": outcome})
+
+        family("internet_monitor_outages_total", "counter", "Number of DOWN transitions.")
+        sample("internet_monitor_outages_total", outages)
+
+        family("internet_monitor_downtime_seconds_total", "counter", "Cumulative time spent disconnected.")
+        sample("internet_monitor_downtime_seconds_total", downtime_s)
+
+        family("internet_monitor_last_down_timestamp_seconds", "gauge", "Time of the last DOWN event.")
+        if last_down_s is not None:
+            sample("internet_monitor_last_down_timestamp_seconds", last_down_s)
+
+        family("internet_monitor_last_up_timestamp_seconds", "gauge", "Time of the last UP event.")
+        if last_up_s is not None:
+            sample("internet_monitor_last_up_timestamp_seconds", last_up_s)
+
+        family("internet_monitor_probe_latency_seconds", "histogram", "Latency of the probe that answered first.")
+        for probe in sorted(latency_buckets):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS_S + (float("inf"),), latency_buckets[probe]):
+                cumulative += count
+                labels = {"probe": probe, "le": _format_value(bound)}
+                sample("internet_monitor_probe_latency_seconds_bucket", cumulative, labels)
+            sample("internet_monitor_probe_latency_seconds_count", cumulative, {"probe": probe})
+            sample("internet_monitor_probe_latency_seconds_sum", latency_sum[probe], {"probe": probe})
+
+        if sum(throughput_tests.values()):
+            family("internet_monitor_throughput_bits_per_second", "gauge", "Goodput measured by the last successful throughput test.")
+            if goodput_bps is not None:
+                sample("internet_monitor_throughput_bits_per_second", goodput_bps)
+            family("internet_monitor_throughput_tests_total", "counter", "Throughput tests by outcome.")
+            for outcome, count in throughput_tests.items():
+                sample("internet_monitor_throughput_tests_total", count, {"result": outcome})
+            family("internet_monitor_throughput_bytes_total", "counter", "Bytes received by throughput tests.")
+            sample("internet_monitor_throughput_bytes_total", throughput_bytes)
+
+        if self.log_writer is not None:
+            stats = self.log_writer.stats()
+            family("internet_monitor_log_queue_depth", "gauge", "Events waiting to be written to the log.")
+            sample("internet_monitor_log_queue_depth", stats["queue_depth"])
+            family("internet_monitor_log_events_written_total", "counter", "Events written to the log.")
+            sample("internet_monitor_log_events_written_total", stats["events_written"])
+            family("internet_monitor_log_events_dropped_total", "counter", "Events dropped because the log queue was full.")
+            sample("internet_monitor_log_events_dropped_total", stats["dropped"])
+            family("internet_monitor_log_write_seconds", "summary", "Time spent writing batches of events.")
+            sample("internet_monitor_log_write_seconds_count", stats["batches_written"])
+            sample("internet_monitor_log_write_seconds_sum", stats["write_seconds_total"])
+
+        if INSTRUMENTATION.enabled:
+            instrumentation = INSTRUMENTATION.snapshot()
+            family("internet_monitor_instrumented_seconds", "summary", "Time spent in the instrumented hot paths.")
+            for name, snapshot in instrumentation["metrics"].items():
+                sample("internet_monitor_instrumented_seconds_count", snapshot["count"], {"name": name})
+                sample("internet_monitor_instrumented_seconds_sum", snapshot["total_ms"] / 1000, {"name": name})
+            family("internet_monitor_loop_stalls_total", "counter", "Event loop callbacks delayed beyond the stall threshold.")
+            sample("internet_monitor_loop_stalls_total", instrumentation["stall_count"])
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
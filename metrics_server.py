@@ -0,0 +1,48 @@
+"""HTTP endpoint serving the MonitorMetrics snapshot in the Prometheus/OpenMetrics text formats.
+
+Kept apart from metrics_exporter so that http.server is only imported when
+the endpoint is enabled (metrics_port).
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics_exporter import OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serve the metrics snapshot on /metrics"""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        # Content negotiation: OpenMetrics only when the scraper asks for it
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = self.server.metrics.render(openmetrics).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are frequent, keep the console quiet
+        pass
+
+
+class MetricsServer:
+    """HTTP endpoint exposing MonitorMetrics, served from a daemon thread"""
+
+    def __init__(self, metrics, port, address="127.0.0.1"):
+        self.httpd = ThreadingHTTPServer((address, int(port)), _MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.metrics = metrics
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and release the port"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join(5)
@@ -0,0 +1,537 @@
+"""GUI-free monitoring core: probing, state machine and event logging.
+
+This module must not import tkinter or winreg, so that the monitor can run
+headless (e.g. as a systemd service or in a container) on any platform.
+"""
+import os
+import queue
+import random
+import signal
+import sys
+import threading
+
+from config import load_config
+from event_store import Event, TextEventStore, open_event_store, import_text_log, now_ms, to_datetime
+from instrumentation import INSTRUMENTATION, Heartbeat, timed
+from latency import LatencyWindow
+from log_rotation import LogRotator
+from log_writer import LogWriter
+from metrics_exporter import MonitorMetrics
+from probe_engine import ProbeEngine, ProbeExecutor, build_probes
+from scheduler import AdaptiveScheduler
+from timeline import MinMaxPyramid
+
+# Determine log file path based on execution mode
+def get_log_file_path():
+    if getattr(sys, 'frozen', False):
+        # If running as a compiled executable, use AppData folder
+        data_dir = os.path.join(os.environ.get('APPDATA', ''), 'InternetMonitor')
+        # Create the directory if it doesn't exist
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        return os.path.join(data_dir, "internet_log.txt")
+    else:
+        # If running as a script, use the current directory
+        return "internet_log.txt"
+
+# Log file path
+LOG_FILE = get_log_file_path()
+
+
+def get_targets_log_path(log_path=LOG_FILE):
+    """Return the path of the text log of the additional targets"""
+    return os.path.splitext(log_path)[0] + "_targets.txt"
+
+
+def get_fleet_spool_path(log_path=LOG_FILE):
+    """Return the path of the spool of events not yet pushed to the fleet collector"""
+    return os.path.join(os.path.dirname(log_path), "fleet_spool.txt")
+
+
+def get_instrumentation_dump_path(log_path=LOG_FILE):
+    """Return the path of the instrumentation dump, next to the event log"""
+    return os.path.join(os.path.dirname(log_path), "instrumentation.json")
+
+
+def next_event(was_connected, connected, last_down_time, last_up_time):
+    """Return the event ("DOWN"/"UP") to log after a check, or None.
+
+    was_connected is None for the first check, which only logs an event when
+    the state differs from the last one found in the log.
+    """
+    if was_connected is None: # First check
+        if not connected:
+            # If at first start there is no connection and there is no previous DOWN event, log it
+            if last_down_time is None or (last_up_time and last_up_time > last_down_time):
+                return "DOWN"
+        else:
+            # If at first start there is connection and the last event was DOWN, log UP
+            if last_down_time and (last_up_time is None or last_down_time > last_up_time):
+                return "UP"
+        return None
+    if connected and not was_connected:
+        return "UP"
+    if not connected and was_connected:
+        return "DOWN"
+    return None
+
+
+def outage_duration_ms(last_down_time, timestamp_ms):
+    """Duration of the outage ending at timestamp_ms, None if its start is unknown"""
+    if last_down_time is None:
+        return None
+    return max(0, timestamp_ms - int(last_down_time.timestamp() * 1000))
+
+
+class TargetState:
+    """State machine and check schedule of one additional monitored target"""
+    # Hundreds of instances may exist, keep them compact
+    __slots__ = ("name", "engine", "scheduler", "latency", "is_connected", "last_down_time", "last_up_time")
+
+    def __init__(self, name, engine, scheduler, latency):
+        self.name = name
+        self.engine = engine
+        self.scheduler = scheduler
+        self.latency = latency
+        self.is_connected = None
+        self.last_down_time = None
+        self.last_up_time = None
+
+
+class TargetSet:
+    """Additional targets (ISPs, VPN concentrators, gateways) monitored side by side.
+
+    All targets share the core's ProbeExecutor and a single results queue.
+    Each target has its own state machine and adaptive schedule: its next
+    check is armed on the executor loop as soon as a result is processed,
+    so no timer per target is needed on the caller's side. Transitions are
+    logged to a separate text log, tagged with the target name.
+    """
+
+    def __init__(self, config, log_path, executor, log_writer, fleet=None):
+        self.config = config
+        self.log_writer = log_writer
+        # Optional FleetPusher also receiving the logged events
+        self.fleet = fleet
+        self.results = queue.Queue()
+        # Callbacks called with (target_name, event_type, datetime) after an event is logged
+        self.listeners = []
+        path = get_targets_log_path(log_path)
+        rotator = LogRotator(
+            path,
+            max_bytes=config["log_rotate_max_bytes"],
+            monthly=config["log_rotate_monthly"],
+            compression=config["log_compression"],
+        )
+        self.event_store = TextEventStore(path, rotator, config["log_format"])
+
+        self.targets = {}
+        for spec in config["targets"]:
+            name = spec.get("name")
+            if not name or name in self.targets:
+                print(f"Skipping target without a unique name: {spec}")
+                continue
+            probes = build_probes(spec.get("probes", []), spec.get("probe_timeout", config["probe_timeout"]))
+            if not probes:
+                print(f"Skipping target {name}: no valid probes")
+                continue
+            engine = ProbeEngine(
+                probes, spec.get("probe_quorum", config["probe_quorum"]), executor, name, self.results
+            )
+            scheduler = AdaptiveScheduler(
+                floor=spec.get("check_interval_min", config["check_interval_min"]),
+                ceiling=spec.get("check_interval_max", config["check_interval_max"]),
+                backoff_factor=config["check_backoff_factor"],
+                jitter=config["check_jitter"],
+            )
+            latency = LatencyWindow(config["latency_window"], config["latency_degraded_ms"])
+            self.targets[name] = TargetState(name, engine, scheduler, latency)
+
+    def add_listener(self, callback):
+        """Register a callback called with (target_name, event_type, datetime) for each logged event"""
+        self.listeners.append(callback)
+
+    def load_last_events(self):
+        """Load the last DOWN and UP times of every target in one backward pass over the log"""
+        if not self.event_store.exists():
+            return
+        for name, (last_down, last_up) in self.event_store.last_events_by_target(self.targets).items():
+            state = self.targets[name]
+            state.last_down_time = to_datetime(last_down.timestamp_ms) if last_down else None
+            state.last_up_time = to_datetime(last_up.timestamp_ms) if last_up else None
+
+    def start(self):
+        """Arm the first check of every target, spread over the shortest interval"""
+        for state in self.targets.values():
+            state.engine.request_check(random.uniform(0, state.scheduler.floor))
+
+    @timed("targets.process_results")
+    def process_results(self):
+        """Apply the pending check results, return the states that were updated"""
+        updated = {}
+        events = []
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            state = self.targets.get(result.target)
+            if state is None:
+                continue
+            if result.latency_ms is not None:
+                state.latency.add(result.latency_ms)
+            event_type = next_event(state.is_connected, result.connected, state.last_down_time, state.last_up_time)
+            state.is_connected = result.connected
+            if event_type is not None:
+                timestamp_ms = now_ms()
+                if event_type == "UP":
+                    duration_ms = outage_duration_ms(state.last_down_time, timestamp_ms)
+                    events.append(Event(timestamp_ms, event_type, state.name, duration_ms, result.latency_ms))
+                else:
+                    events.append(Event(timestamp_ms, event_type, state.name))
+            # Arm the next check of this target on the executor loop
+            state.engine.request_check(state.scheduler.record(result.connected))
+            updated[state.name] = state
+
+        if events:
+            # Written in one batch by the log writer thread
+            for event in events:
+                self.log_writer.submit(self.event_store, event)
+                if self.fleet is not None:
+                    self.fleet.submit(event)
+            for event in events:
+                state = self.targets[event.target]
+                when = to_datetime(event.timestamp_ms)
+                if event.event == "DOWN":
+                    state.last_down_time = when
+                else:
+                    state.last_up_time = when
+                for callback in self.listeners:
+                    callback(event.target, event.event, when)
+        return list(updated.values())
+
+    def expedite(self):
+        """Check every target now, e.g. after a local network change"""
+        for state in self.targets.values():
+            state.engine.expedite()
+
+    def close(self):
+        """Cancel the pending checks"""
+        for state in self.targets.values():
+            state.engine.stop()
+
+
+class MonitorCore:
+    """Connection state machine shared by the GUI and the headless mode.
+
+    The core owns the probe engine, the adaptive scheduler, the latency
+    window and the event store. Front ends feed it check results with
+    process_result() and are notified of logged events through listeners.
+    Additional targets from the "targets" setting are handled by a TargetSet
+    sharing the same probe executor.
+    """
+
+    def __init__(self, config=None, log_path=LOG_FILE):
+        self.config = config or load_config()
+        self.log_path = log_path
+        if self.config.get("instrumentation"):
+            # Opt-in timing of the hot paths, see instrumentation.py
+            INSTRUMENTATION.enable(self.config["stall_threshold_ms"])
+        self.is_connected = None
+        self.last_down_time = None
+        self.last_up_time = None
+        # Callbacks called with (event_type, datetime) after an event is logged
+        self.listeners = []
+        self.latency = LatencyWindow(self.config["latency_window"], self.config["latency_degraded_ms"])
+        # Every latency sample of the session, for the timeline chart
+        self.latency_history = MinMaxPyramid()
+        # Last measured goodput (bits/s) and slow link state, from the optional throughput probe
+        self.goodput_bps = None
+        self.is_slow = False
+        self.slow_since_ms = None
+
+        # Event log backend (plain text, SQLite or binary records)
+        self.event_store = open_event_store(self.config, log_path)
+        self.import_legacy_log()
+        # Events are written by a background thread, batched and synced per the fsync policy
+        self.log_writer = LogWriter(
+            fsync=self.config["log_fsync"],
+            fsync_interval_ms=self.config["log_fsync_interval_ms"],
+            max_queue=self.config["log_queue_size"],
+        )
+        self._closed = False
+
+        # Optional push of the logged events to a fleet collector
+        self.fleet = None
+        if self.config.get("fleet_url"):
+            # Imported only when enabled, urllib.request is not needed otherwise
+            from fleet_client import FleetPusher
+            try:
+                self.fleet = FleetPusher(
+                    self.config["fleet_url"],
+                    get_fleet_spool_path(log_path),
+                    host=self.config.get("fleet_host"),
+                    batch_size=self.config["fleet_batch_size"],
+                    flush_interval=self.config["fleet_flush_interval"],
+                    max_spool_events=self.config["fleet_spool_max_events"],
+                )
+            except ValueError as e:
+                print(f"Fleet push disabled: {e}")
+
+        # Background probe executor shared by every target, keeps network I/O off the caller's thread
+        self.executor = ProbeExecutor(self.config["max_concurrent_probes"])
+        probes = build_probes(self.config["probes"], self.config["probe_timeout"])
+        self.probe_engine = ProbeEngine(probes, self.config["probe_quorum"], self.executor)
+        self.scheduler = AdaptiveScheduler(
+            floor=self.config["check_interval_min"],
+            ceiling=self.config["check_interval_max"],
+            backoff_factor=self.config["check_backoff_factor"],
+            jitter=self.config["check_jitter"],
+        )
+        # Lag of the probe loop: a blocked loop delays every check
+        self.probe_heartbeat = None
+        if INSTRUMENTATION.enabled:
+            self.probe_heartbeat = Heartbeat("probe_loop", self.executor.loop.call_later)
+            self.executor.loop.call_soon_threadsafe(self.probe_heartbeat.start)
+
+        self.targets = None
+        if self.config.get("targets"):
+            self.targets = TargetSet(self.config, log_path, self.executor, self.log_writer, self.fleet)
+
+        # Metrics are updated on every check, the optional endpoint only snapshots them
+        self.metrics = MonitorMetrics(self.log_writer)
+        self.metrics_server = None
+        if self.config.get("metrics_port") is not None:
+            # Imported only when enabled, http.server is not needed otherwise
+            from metrics_server import MetricsServer
+            try:
+                self.metrics_server = MetricsServer(
+                    self.metrics, self.config["metrics_port"], self.config.get("metrics_address", "127.0.0.1")
+                )
+            except OSError as e:
+                print(f"Error starting metrics endpoint on port {self.config['metrics_port']}: {e}")
+
+        # Optional bounded-cost throughput tests, only run while connected
+        self.throughput_probe = None
+        if self.config.get("throughput_url"):
+            # Imported only when enabled, like the other optional features
+            from throughput_probe import ThroughputProbe
+            try:
+                self.throughput_probe = ThroughputProbe(
+                    self.config["throughput_url"],
+                    interval=self.config["throughput_interval"],
+                    max_bytes=self.config["throughput_max_bytes"],
+                    max_seconds=self.config["throughput_max_seconds"],
+                    budget_bytes_per_hour=self.config["throughput_budget_bytes_per_hour"],
+                    budget_seconds_per_hour=self.config["throughput_budget_seconds_per_hour"],
+                    should_run=lambda: self.is_connected is True,
+                )
+            except ValueError as e:
+                print(f"Throughput probe disabled: {e}")
+
+        # Optional passive detection of local network changes (Linux only)
+        self.link_watcher = None
+        if self.config.get("link_watch"):
+            # Imported only when enabled, like the other optional features
+            from link_watcher import LinkWatcher, is_supported as link_watch_supported
+            if not link_watch_supported():
+                print("Network change detection (link_watch) is only available on Linux, ignored")
+            else:
+                try:
+                    self.link_watcher = LinkWatcher(self.on_network_change)
+                except OSError as e:
+                    print(f"Error starting network change detection: {e}")
+
+    def add_listener(self, callback):
+        """Register a callback called with (event_type, datetime) for each logged event"""
+        self.listeners.append(callback)
+
+    def load_last_events(self):
+        """Load the last DOWN and UP times, and the slow link state, from the event store"""
+        if not self.event_store.exists():
+            return
+        last_down, last_up = self.event_store.last_events()
+        self.last_down_time = to_datetime(last_down.timestamp_ms) if last_down else None
+        self.last_up_time = to_datetime(last_up.timestamp_ms) if last_up else None
+        self.metrics.set_last_events(
+            last_down.timestamp_ms / 1000 if last_down else None,
+            last_up.timestamp_ms / 1000 if last_up else None,
+        )
+        if self.throughput_probe is not None:
+            # Resume a slow interval left open by the previous run, so that the next
+            # recovery still logs NORMAL
+            last_slow = self.event_store.last_event("SLOW")
+            last_normal = self.event_store.last_event("NORMAL") if last_slow else None
+            self.is_slow = last_slow is not None and (last_normal is None or last_slow.timestamp_ms > last_normal.timestamp_ms)
+            self.slow_since_ms = last_slow.timestamp_ms if self.is_slow else None
+
+    def import_legacy_log(self):
+        """Import the text log into an empty non-text event store (one-shot)"""
+        if self.event_store.backend == "text" or not os.path.exists(self.log_path):
+            return
+        try:
+            if self.event_store.is_empty():
+                imported = import_text_log(self.log_path, self.event_store)
+                print(f"Imported {imported} events from {self.log_path}")
+        except Exception as e:
+            print(f"Error importing log file {self.log_path}: {e}")
+
+    @timed("log.event")
+    def log_event(self, event_type, latency_ms=None):
+        """Log a DOWN/UP event; an UP event also records the outage duration and the check latency"""
+        timestamp_ms = now_ms()
+        if event_type == "UP":
+            event = Event(timestamp_ms, event_type, None, outage_duration_ms(self.last_down_time, timestamp_ms), latency_ms)
+        elif event_type == "NORMAL" and self.slow_since_ms is not None:
+            event = Event(timestamp_ms, event_type, None, max(0, timestamp_ms - self.slow_since_ms))
+        else:
+            event = Event(timestamp_ms, event_type)
+        if event_type == "SLOW":
+            self.slow_since_ms = timestamp_ms
+        self.log_writer.submit(self.event_store, event)
+        if self.fleet is not None:
+            self.fleet.submit(event)
+        now = to_datetime(timestamp_ms)
+        if event_type == "DOWN":
+            self.last_down_time = now
+        elif event_type == "UP":
+            self.last_up_time = now
+        self.metrics.observe_event(event_type, now.timestamp())
+        for callback in self.listeners:
+            callback(event_type, now)
+
+    def flush_log(self):
+        """Wait until the queued events are on disk, e.g. before reading or deleting the log"""
+        return self.log_writer.flush()
+
+    def request_check(self, delay=0):
+        """Ask the background probe engine for a new connection check, after `delay` seconds"""
+        return self.probe_engine.request_check(delay)
+
+    def on_network_change(self, changes):
+        """Confirm the connection state at once after a link, address or default route change"""
+        print(f"Network change detected ({', '.join(sorted(changes))}), checking the connection")
+        # Called on the link watcher thread, the engines are thread-safe
+        self.probe_engine.expedite()
+        if self.targets is not None:
+            self.targets.expedite()
+
+    @timed("core.process_result")
+    def process_result(self, result):
+        """Update state and log transitions after a check, return the delay (s) before the next one"""
+        currently_connected = result.connected
+        if result.latency_ms is not None:
+            self.latency.add(result.latency_ms)
+            self.latency_history.append(now_ms(), result.latency_ms)
+        self.metrics.observe_check(result)
+        self.metrics.observe_state(currently_connected)
+
+        event_type = next_event(self.is_connected, currently_connected, self.last_down_time, self.last_up_time)
+        self.is_connected = currently_connected
+        if event_type is not None:
+            self.log_event(event_type, result.latency_ms)
+
+        # Fast checks while down or flapping, slower once stable
+        return self.scheduler.record(currently_connected)
+
+    def process_throughput(self):
+        """Apply the pending throughput results and log SLOW/NORMAL transitions, return whether any arrived"""
+        if self.throughput_probe is None:
+            return False
+        results = self.throughput_probe.get_results()
+        for result in results:
+            self.metrics.observe_throughput(result)
+            if result.goodput_bps is None:
+                continue
+            self.goodput_bps = result.goodput_bps
+            slow = result.goodput_bps < self.config["throughput_slow_mbps"] * 1_000_000
+            if slow != self.is_slow:
+                self.is_slow = slow
+                self.log_event("SLOW" if slow else "NORMAL")
+        return bool(results)
+
+    def close(self):
+        """Stop the probe engines and the metrics endpoint, write pending events, release the event stores"""
+        if self._closed:
+            return
+        self._closed = True
+        if self.link_watcher is not None:
+            self.link_watcher.stop()
+        if self.throughput_probe is not None:
+            self.throughput_probe.stop()
+        if self.probe_heartbeat is not None:
+            self.probe_heartbeat.stop()
+        if self.targets is not None:
+            self.targets.close()
+        self.probe_engine.stop()
+        self.executor.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        # Flush the queued events before the stores are closed
+        self.log_writer.close()
+        if self.fleet is not None:
+            # Last delivery attempt, what is left stays in the spool for the next start
+            self.fleet.close()
+        self.event_store.close()
+        if self.targets is not None:
+            self.targets.event_store.close()
+        if INSTRUMENTATION.enabled:
+            self.dump_instrumentation()
+
+    def dump_instrumentation(self):
+        """Write the instrumentation counters and recent stalls to a JSON file, return its path"""
+        path = get_instrumentation_dump_path(self.log_path)
+        try:
+            INSTRUMENTATION.dump(path)
+        except OSError as e:
+            print(f"Error writing instrumentation dump {path}: {e}")
+            return None
+        return path
+
+
+def run_headless(config=None, log_path=LOG_FILE):
+    """Run the monitor without GUI until SIGINT/SIGTERM, printing each transition"""
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    core = MonitorCore(config, log_path)
+    if INSTRUMENTATION.enabled and hasattr(signal, "SIGUSR1"):
+        # kill -USR1 <pid> writes the instrumentation dump without stopping the monitor
+        signal.signal(signal.SIGUSR1, lambda signum, frame: print(f"Instrumentation written to {core.dump_instrumentation()}"))
+    core.add_listener(lambda event_type, when: print(f"{when:%Y/%m/%d %H:%M:%S} - {event_type}", flush=True))
+    try:
+        core.load_last_events()
+    except Exception as e:
+        print(f"Error loading log file: {e}")
+    if core.targets is not None:
+        core.targets.add_listener(
+            lambda target, event_type, when: print(f"{when:%Y/%m/%d %H:%M:%S} - {event_type} - {target}", flush=True)
+        )
+        try:
+            core.targets.load_last_events()
+        except Exception as e:
+            print(f"Error loading target log file: {e}")
+        core.targets.start()
+
+    try:
+        core.request_check()
+        while not stop.is_set():
+            try:
+                # Short timeout so a stop request and target results are handled quickly
+                result = core.probe_engine.results.get(timeout=0.2)
+            except queue.Empty:
+                result = None
+            if result is not None:
+                # The next check is armed on the probe loop after the adaptive delay
+                core.request_check(core.process_result(result))
+            if core.targets is not None:
+                core.targets.process_results()
+            core.process_throughput()
+    finally:
+        core.close()
@@ -0,0 +1,474 @@
+import tkinter as tk
+from tkinter import ttk, font, messagebox
+import os
+import sys
+import locale
+import threading
+from localization import Localization
+from config import load_config
+from event_store import open_event_store, export_text_log
+from instrumentation import INSTRUMENTATION, Heartbeat, timed
+from monitor_core import MonitorCore, LOG_FILE
+from autostart import get_autostart_backend
+from instrumentation_window import InstrumentationWindow
+from statistics_window import StatisticsWindow
+from targets_window import TargetsWindow
+from timeline_window import TimelineWindow
+
+# Interval for draining probe results posted by the background engine (milliseconds)
+RESULT_POLL_MS = 100
+
+class InternetMonitorApp:
+    def __init__(self, root: tk.Tk, config=None):
+        # Set the locale for system date and time format
+        locale.setlocale(locale.LC_TIME, '')
+        
+        # Initialize localization
+        self.localization = Localization()
+
+        # Load user settings
+        self.config = config or load_config()
+        
+        self.root = root
+        self.root.title(self.localization.get_string("app_title"))
+        self.root.geometry("600x250") # Fixed size
+        self.root.resizable(False, False) # Not resizable
+
+        # Determine base path for resources
+        if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+            # If the application is run as a bundle (e.g., by PyInstaller)
+            base_path = sys._MEIPASS
+        else:
+            # If the application is run as a normal Python script
+            base_path = os.path.dirname(os.path.abspath(__file__))
+        
+        icon_path = os.path.join(base_path, 'icon', 'internet-monitor.ico')
+        self.root.iconbitmap(icon_path)
+
+        # Monitoring core: probes, state machine and event log
+        self.monitor = MonitorCore(self.config, LOG_FILE)
+        self.monitor.add_listener(self.on_event_logged)
+        self.load_last_events()
+        self.targets_window = None
+        self.instrumentation_window = None
+        # True while the log is being exported for open_log_file
+        self._log_export_running = False
+
+        # Styles
+        self.bold_font = font.Font(weight="bold", size=16)
+        self.status_font_connected = font.Font(weight="bold", size=20)
+        self.status_font_disconnected = font.Font(weight="bold", size=20)
+        self.button_font = font.Font(size=14) # Added font for the button
+
+        # Localized elements, bound to their localization key when created so a
+        # language switch is a single pass over them: (widget, key) for widgets
+        # and tooltips, (menu, index, key) for menu entries
+        self._text_bindings = []
+        self._menu_bindings = []
+
+        # Create menu bar
+        self.menu_bar = tk.Menu(root)
+        self.root.config(menu=self.menu_bar)
+        
+        # Language menu - creazione dinamica del menu delle lingue
+        self.language_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.menu_bar.add_cascade(label=self.localization.get_string("language_menu"), menu=self.language_menu)
+        self.bind_menu_label(self.menu_bar, self.menu_bar.index(tk.END), "language_menu")
+        
+        # Add a menu item for each available language, labels and checkmark are set by update_language_menu
+        for lang_code in self.localization.get_available_languages():
+            self.language_menu.add_command(label=lang_code, command=lambda code=lang_code: self.change_language(code))
+        self.update_language_menu()
+            
+        # Autostart menu
+        self.autostart_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.menu_bar.add_cascade(label=self.localization.get_string("autostart_menu"), menu=self.autostart_menu)
+        self.bind_menu_label(self.menu_bar, self.menu_bar.index(tk.END), "autostart_menu")
+        
+        # Add menu item for autostart, label and checkmark are set by update_autostart_menu
+        self.autostart = get_autostart_backend()
+        self.autostart_menu.add_command(label="", command=self.toggle_autostart,
+                                        state=tk.NORMAL if self.autostart.supported else tk.DISABLED)
+        self.update_autostart_menu()
+        
+        # Main frame
+        main_frame = ttk.Frame(root, padding="10 10 10 10")
+        main_frame.pack(expand=True, fill=tk.BOTH)
+
+        # Status message
+        self.status_label = ttk.Label(main_frame, text=self.localization.get_string("checking"), font=self.status_font_connected, anchor=tk.CENTER)
+        self.status_label.pack(pady=(10, 0), fill=tk.X)
+
+        # Rolling latency percentiles, shown under the status message
+        self.latency_label = ttk.Label(main_frame, text="", anchor=tk.CENTER)
+        self.latency_label.pack(pady=(0, 5), fill=tk.X)
+
+        # Frame for event information
+        info_frame = ttk.Frame(main_frame)
+        info_frame.pack(fill=tk.X, pady=5)
+
+        # Last disconnection
+        self.bind_text(ttk.Label(info_frame, font=self.bold_font), "last_disconnection").grid(row=0, column=0, sticky=tk.W, padx=5)
+        self.last_down_label = ttk.Label(info_frame, text=self.localization.get_string("not_available"), font=self.bold_font, foreground="red")
+        self.last_down_label.grid(row=0, column=1, sticky=tk.E, padx=5)
+        if self.monitor.last_down_time:
+            self.last_down_label.config(text=self.monitor.last_down_time.strftime("%x %H:%M"), font=self.bold_font)
+
+        # Last reconnection
+        self.bind_text(ttk.Label(info_frame, font=self.bold_font), "last_reconnection").grid(row=1, column=0, sticky=tk.W, padx=5)
+        self.last_up_label = ttk.Label(info_frame, text=self.localization.get_string("not_available"), font=self.bold_font, foreground="green")
+        self.last_up_label.grid(row=1, column=1, sticky=tk.E, padx=5)
+        if self.monitor.last_up_time:
+            self.last_up_label.config(text=self.monitor.last_up_time.strftime("%x %H:%M"), font=self.bold_font)
+
+        info_frame.columnconfigure(0, weight=1)
+        info_frame.columnconfigure(1, weight=1)
+
+        # Frame for bottom buttons
+        bottom_buttons_frame = ttk.Frame(main_frame)
+        bottom_buttons_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(0, 5)) # pady=(top, bottom)
+
+        style = ttk.Style() # Ensure style is available or re-configure if needed
+        style.configure("Large.TButton", font=self.button_font)
+
+        # Log file button - positioned at bottom left
+        self.log_button = ttk.Button(bottom_buttons_frame, text="📄", command=self.open_log_file, style="Large.TButton")
+        self.log_button.pack(side=tk.LEFT, anchor=tk.SW, padx=10, pady=5) # padx for horizontal, pady for vertical spacing within frame
+        self.create_tooltip(self.log_button, "open_log_tooltip")
+        
+        # Delete log file button - positioned next to log button
+        self.delete_log_button = ttk.Button(bottom_buttons_frame, text="❌", command=self.delete_log_file, style="Large.TButton")
+        self.delete_log_button.pack(side=tk.LEFT, anchor=tk.SW, padx=10, pady=5)
+        self.create_tooltip(self.delete_log_button, "delete_log_tooltip")
+
+        # Statistics button - positioned next to delete log button
+        self.statistics_button = ttk.Button(bottom_buttons_frame, text="📊", command=self.show_statistics, style="Large.TButton")
+        self.statistics_button.pack(side=tk.LEFT, anchor=tk.SW, padx=10, pady=5)
+        self.create_tooltip(self.statistics_button, "statistics_tooltip")
+
+        # Timeline button - positioned next to statistics button
+        self.timeline_button = ttk.Button(bottom_buttons_frame, text="📈", command=self.show_timeline, style="Large.TButton")
+        self.timeline_button.pack(side=tk.LEFT, anchor=tk.SW, padx=10, pady=5)
+        self.create_tooltip(self.timeline_button, "timeline_tooltip")
+
+        # Targets button, only when additional targets are configured
+        if self.monitor.targets is not None:
+            self.targets_button = ttk.Button(bottom_buttons_frame, text="🌐", command=self.show_targets, style="Large.TButton")
+            self.targets_button.pack(side=tk.LEFT, anchor=tk.SW, padx=10, pady=5)
+            self.create_tooltip(self.targets_button, "targets_tooltip")
+
+        # Close button - positioned at bottom right
+        self.close_button = self.bind_text(ttk.Button(bottom_buttons_frame, command=self.close, style="Large.TButton"), "close_button")
+        self.close_button.pack(side=tk.RIGHT, anchor=tk.SE, padx=10, pady=5) # padx for horizontal, pady for vertical spacing within frame
+
+        # Closing the window also writes the pending log events
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+        if INSTRUMENTATION.enabled:
+            # Lag of the Tk main loop, and F12 for the instrumentation window
+            Heartbeat("tk_mainloop", lambda delay, callback: self.root.after(int(delay * 1000), callback)).start()
+            self.root.bind("<F12>", lambda event: self.show_instrumentation())
+
+        self.check_connection()
+        if self.monitor.targets is not None:
+            self.monitor.targets.start()
+        self.poll_probe_results()
+
+    def close(self):
+        """Stop monitoring, write the pending log events and leave the main loop"""
+        self.monitor.close()
+        self.root.quit()
+
+    def on_event_logged(self, event_type, when):
+        """Show the time of a DOWN/UP event logged by the monitoring core"""
+        if event_type == "DOWN":
+            self.last_down_label.config(text=when.strftime("%x %H:%M"))
+        elif event_type == "UP":
+            self.last_up_label.config(text=when.strftime("%x %H:%M"))
+
+    def load_last_events(self):
+        try:
+            self.monitor.load_last_events()
+            if self.monitor.targets is not None:
+                self.monitor.targets.load_last_events()
+        except Exception as e:
+            error_msg = f"Error loading log file: {e}"
+            print(error_msg) # Log to console for debugging
+            messagebox.showerror("Error", error_msg) # Show error in GUI
+
+    @timed("gui.update_status")
+    def update_status(self, connected):
+        if connected and (self.monitor.latency.is_degraded() or self.monitor.is_slow):
+            self.status_label.config(text=self.localization.get_string("connected_degraded"), foreground="orange", font=self.status_font_connected)
+        elif connected:
+            self.status_label.config(text=self.localization.get_string("connected"), foreground="green", font=self.status_font_connected)
+        else:
+            self.status_label.config(text=self.localization.get_string("disconnected"), foreground="red", font=self.status_font_disconnected)
+        self.update_latency_label()
+
+    def update_latency_label(self):
+        """Show the rolling latency percentiles next to the status message"""
+        p50, p95, p99 = self.monitor.latency.summary()
+        if p50 is None:
+            self.latency_label.config(text="")
+            return
+        text = self.localization.get_string("latency_summary").format(f"{p50:.0f}", f"{p95:.0f}", f"{p99:.0f}")
+        if self.monitor.goodput_bps is not None:
+            # Last throughput test, when enabled
+            text += f" · {self.monitor.goodput_bps / 1_000_000:.1f} Mbit/s"
+        self.latency_label.config(text=text)
+
+    def check_connection(self):
+        """Ask the background probe engine for a new connection check"""
+        # The next check is armed by poll_probe_results once this one completes
+        self.monitor.request_check()
+
+    @timed("gui.poll_results")
+    def poll_probe_results(self):
+        """Drain probe results posted by the background engine"""
+        for result in self.monitor.probe_engine.get_results():
+            delay = self.monitor.process_result(result)
+            self.update_status(self.monitor.is_connected)
+            # Armed on the probe loop, so a network change can bring it forward
+            self.monitor.request_check(delay)
+        if self.monitor.targets is not None:
+            # Targets schedule their own next check, only the view needs updating
+            updated = self.monitor.targets.process_results()
+            if updated and self.targets_window is not None and self.targets_window.winfo_exists():
+                self.targets_window.update_targets(updated)
+        if self.monitor.process_throughput() and self.monitor.is_connected is not None:
+            self.update_status(self.monitor.is_connected)
+        self.root.after(RESULT_POLL_MS, self.poll_probe_results)
+
+    def toggle_autostart(self):
+        """Toggle automatic startup at login"""
+        if self.autostart.set_enabled(not self.autostart.is_enabled()):
+            # Update the checkmark
+            self.update_autostart_menu()
+    
+    def bind_text(self, widget, key):
+        """Set a widget's text from a localization key and keep the binding for language switches"""
+        widget.config(text=self.localization.get_string(key))
+        self._text_bindings.append((widget, key))
+        return widget
+
+    def bind_menu_label(self, menu, index, key):
+        """Keep the localization key of a menu entry for language switches"""
+        self._menu_bindings.append((menu, index, key))
+
+    def _language_label(self, lang_code):
+        """Return the display name of a language"""
+        # Get the localized name of the language
+        lang_name = self.localization.get_string(lang_code)
+        # If the language name is not available, use the language code
+        if lang_name == lang_code:
+            # Try to get the language name from the English translation
+            lang_name = self.localization.get_string(lang_code, "en")
+            if lang_name == lang_code:
+                # If still not available, use the language code with the first letter capitalized
+                lang_name = lang_code.capitalize()
+        return lang_name
+
+    def update_language_menu(self):
+        """Relabel the language entries in place, with a checkmark (✓) next to the current language"""
+        current = self.localization.get_current_language()
+        for index, lang_code in enumerate(self.localization.get_available_languages()):
+            lang_name = self._language_label(lang_code)
+            if lang_code == current:
+                lang_name = "✓ " + lang_name
+            self.language_menu.entryconfig(index, label=lang_name)
+
+    @timed("gui.update_autostart_menu")
+    def update_autostart_menu(self):
+        """Relabel the autostart entry in place, with a checkmark if autostart is enabled"""
+        autostart_label = self.localization.get_string("autostart_option")
+        # Answered from the backend's cache, the system setting is only read after a change
+        if self.autostart.is_enabled():
+            autostart_label = "✓ " + autostart_label
+        self.autostart_menu.entryconfig(0, label=autostart_label)
+
+    @timed("gui.update_menus")
+    def update_menus(self):
+        """Update all menus with current settings"""
+        for menu, index, key in self._menu_bindings:
+            menu.entryconfig(index, label=self.localization.get_string(key))
+        self.update_language_menu()
+        self.update_autostart_menu()
+    
+    @timed("gui.change_language")
+    def change_language(self, lang_code):
+        """Change the application language"""
+        if self.localization.set_language(lang_code):
+            # Update all UI text elements
+            self.root.title(self.localization.get_string("app_title"))
+            
+            # Update the status label with the correct localized text
+            if self.monitor.is_connected is None:
+                self.status_label.config(text=self.localization.get_string("checking"))
+            else:
+                self.update_status(self.monitor.is_connected)
+            
+            # Update all menus
+            self.update_menus()
+            
+            # Update all user interface elements
+            self._update_all_ui_elements()
+            
+    def _update_all_ui_elements(self):
+        """Update all user interface elements with localized text"""
+        # Single pass over the elements bound to a localization key
+        for widget, key in self._text_bindings:
+            widget.config(text=self.localization.get_string(key))
+        
+        # Update dynamic labels with correct values
+        if self.monitor.last_down_time:
+            self.last_down_label.config(text=self.monitor.last_down_time.strftime("%x %H:%M"))
+        else:
+            self.last_down_label.config(text=self.localization.get_string("not_available"))
+            
+        if self.monitor.last_up_time:
+            self.last_up_label.config(text=self.monitor.last_up_time.strftime("%x %H:%M"))
+        else:
+            self.last_up_label.config(text=self.localization.get_string("not_available"))
+            
+    def create_tooltip(self, widget, key):
+        """Create a tooltip for a given widget, showing the text of a localization key"""
+        # Creare il tooltip come figlio della finestra principale invece che del widget
+        tooltip_label = self.bind_text(tk.Label(self.root, background="#FFFFEA", relief="solid", borderwidth=1), key)
+        
+        def enter(event):
+            # Calcolare la posizione relativa alla finestra principale
+            x = widget.winfo_rootx() - self.root.winfo_rootx() + 20
+            y = widget.winfo_rooty() - self.root.winfo_rooty() + widget.winfo_height() + 1
+            tooltip_label.place(x=x, y=y)
+            
+        def leave(event):
+            tooltip_label.place_forget()
+            
+        widget.bind("<Enter>", enter)
+        widget.bind("<Leave>", leave)
+        
+        if not hasattr(widget, "tooltip"):
+            widget.tooltip = tooltip_label
+    
+    def open_log_file(self):
+        """Open the log file with the default system application"""
+        try:
+            self.monitor.flush_log()
+            if not self.monitor.event_store.exists():
+                messagebox.showinfo("Info", self.localization.get_string("log_file_not_found"))
+                return
+            store = self.monitor.event_store
+            if store.backend == "text" and os.path.exists(store.path):
+                # Text logs (v1 or v2) are readable as they are
+                self._open_with_system(store.path)
+                return
+        except Exception as e:
+            self._show_open_log_error(e)
+            return
+        if self._log_export_running:
+            return
+        # Binary and database logs (or fully rotated text logs) are exported to a
+        # readable text file first, on a worker thread: the export reads the whole history
+        self._log_export_running = True
+        export_path = os.path.splitext(LOG_FILE)[0] + "_export.txt"
+        result = {}
+
+        def work():
+            store = open_event_store(self.config, LOG_FILE)
+            try:
+                export_text_log(store, export_path, version=1)
+            except Exception as e:
+                result["error"] = e
+            finally:
+                store.close()
+
+        worker = threading.Thread(target=work, name="LogExport", daemon=True)
+        worker.start()
+        self.root.after(50, self._wait_for_log_export, worker, result, export_path)
+
+    def _wait_for_log_export(self, worker, result, export_path):
+        """Open the exported log once the worker thread is done"""
+        if worker.is_alive():
+            self.root.after(50, self._wait_for_log_export, worker, result, export_path)
+            return
+        self._log_export_running = False
+        try:
+            if "error" in result:
+                raise result["error"]
+            self._open_with_system(export_path)
+        except Exception as e:
+            self._show_open_log_error(e)
+
+    def _open_with_system(self, log_path):
+        """Open a file with the default system application"""
+        # Use the appropriate command based on the operating system
+        if sys.platform == 'win32':
+            os.startfile(log_path)
+        elif sys.platform == 'darwin':  # macOS
+            os.system(f'open "{log_path}"')
+        else:  # Linux and other Unix-like systems
+            os.system(f'xdg-open "{log_path}"')
+
+    def _show_open_log_error(self, e):
+        error_msg = f"Error opening log file: {e}"
+        print(error_msg)  # Log to console for debugging
+        messagebox.showerror("Error", error_msg) # Show error in GUI
+            
+    def show_statistics(self):
+        """Open the availability statistics window"""
+        self.monitor.flush_log()
+        StatisticsWindow(self.root, self.localization, lambda: open_event_store(self.config, LOG_FILE))
+
+    def show_timeline(self):
+        """Open the outage and latency timeline window"""
+        self.monitor.flush_log()
+        TimelineWindow(self.root, self.localization, lambda: open_event_store(self.config, LOG_FILE),
+                       self.monitor.latency_history)
+
+    def show_targets(self):
+        """Open the per-target status window, or raise it if already open"""
+        if self.targets_window is not None and self.targets_window.winfo_exists():
+            self.targets_window.lift()
+            return
+        self.targets_window = TargetsWindow(self.root, self.localization, self.monitor.targets)
+
+    def show_instrumentation(self):
+        """Open the instrumentation window, or raise it if already open"""
+        if self.instrumentation_window is not None and self.instrumentation_window.winfo_exists():
+            self.instrumentation_window.lift()
+            return
+        self.instrumentation_window = InstrumentationWindow(self.root, self.localization, self.monitor.dump_instrumentation)
+
+    def delete_log_file(self):
+        """Delete the log file after confirmation"""
+        try:
+            # Write the queued events first, so none is written after the deletion
+            self.monitor.flush_log()
+            # Check if log file exists
+            if not self.monitor.event_store.exists():
+                messagebox.showinfo("Info", self.localization.get_string("log_file_not_found"))
+                return
+                
+            # Ask for confirmation before deleting
+            # Default is 'no' (False) as requested
+            if messagebox.askyesno(
+                "Confirmation", 
+                self.localization.get_string("delete_log_confirm"),
+                default=messagebox.NO
+            ):
+                # Delete the file
+                self.monitor.event_store.delete()
+                
+                # Show notification of successful deletion
+                messagebox.showinfo("Info", self.localization.get_string("delete_log_success"))
+                
+                # Reset the last event times and update UI
+                self.monitor.last_down_time = None
+                self.monitor.last_up_time = None
+                self.last_down_label.config(text=self.localization.get_string("not_available"))
+                self.last_up_label.config(text=self.localization.get_string("not_available"))
+        except Exception as e:
+            error_msg = f"Error deleting log file: {e}"
+            print(error_msg)  # Log to console for debugging
+            messagebox.showerror("Error", self.localization.get_string("delete_log_error").format(str(e))) # Show localized error in GUI
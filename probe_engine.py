@@ -0,0 +1,358 @@
+import asyncio
+import queue
+import ssl
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from instrumentation import timed
+
+DEFAULT_PROBE_TIMEOUT = 3.0
+
+# Outcome of a connection check: latency_ms and probe describe the first probe that answered,
+# target is the name of the monitored target (None for the main Internet connection)
+CheckResult = namedtuple("CheckResult", ["connected", "latency_ms", "probe", "target"], defaults=(None,))
+
+
+async def _close_writer(writer):
+    """Close a stream deterministically instead of leaving it to the garbage collector"""
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+
+class Probe:
+    """Base class for a single connectivity probe"""
+    kind = None
+
+    def __init__(self, timeout=DEFAULT_PROBE_TIMEOUT):
+        self.timeout = timeout
+
+    @timed("probe.run")
+    async def run(self):
+        """Run the probe, return the round-trip time in milliseconds or None on failure"""
+        start = time.perf_counter_ns()
+        try:
+            answered = await asyncio.wait_for(self._probe(), self.timeout)
+        except (OSError, asyncio.TimeoutError, ValueError):
+            # On timeout wait_for cancels the pending I/O and asyncio closes the socket
+            return None
+        if answered is None:
+            return None
+        return (answered - start) / 1e6
+
+    async def _probe(self):
+        """Probe the target, return the perf_counter_ns() time of the answer or None"""
+        raise NotImplementedError
+
+    def describe(self):
+        """Return a short human readable description of the probe"""
+        return self.kind
+
+
+class TcpProbe(Probe):
+    """Open and immediately close a TCP connection"""
+    kind = "tcp"
+
+    def __init__(self, host, port, timeout=DEFAULT_PROBE_TIMEOUT):
+        super().__init__(timeout)
+        self.host = host
+        self.port = int(port)
+
+    async def _probe(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        answered = time.perf_counter_ns()
+        await _close_writer(writer)
+        return answered
+
+    def describe(self):
+        return f"tcp://{self.host}:{self.port}"
+
+
+class _DnsResponseProtocol(asyncio.DatagramProtocol):
+    """Resolve a future with the arrival time of the DNS response matching a query id"""
+
+    def __init__(self, query_id, answered):
+        self.query_id = query_id
+        self.answered = answered
+
+    def datagram_received(self, data, addr):
+        # Any response (even NXDOMAIN) with our id proves the resolver is reachable
+        if len(data) >= 12 and int.from_bytes(data[:2], "big") == self.query_id and data[2] & 0x80:
+            if not self.answered.done():
+                self.answered.set_result(time.perf_counter_ns())
+
+    def error_received(self, exc):
+        if not self.answered.done():
+            self.answered.set_exception(exc)
+
+
+class DnsProbe(Probe):
+    """Resolve a host name through the system resolver, or query a DNS server directly over UDP"""
+    kind = "dns"
+
+    def __init__(self, host, timeout=DEFAULT_PROBE_TIMEOUT, server=None, port=53):
+        super().__init__(timeout)
+        self.host = host
+        self.server = server
+        self.port = int(port)
+        self._query_id = 0
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        if self.server is None:
+            addresses = await loop.getaddrinfo(self.host, None)
+            return time.perf_counter_ns() if addresses else None
+
+        # Direct query: bypasses the resolver cache of the operating system
+        self._query_id = (self._query_id + 1) & 0xFFFF
+        answered = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DnsResponseProtocol(self._query_id, answered),
+            remote_addr=(self.server, self.port),
+        )
+        try:
+            transport.sendto(self._build_query(self._query_id))
+            return await answered
+        finally:
+            transport.close()
+
+    def _build_query(self, query_id):
+        """Build a recursive DNS query for the A record of the host"""
+        # Header: id, flags (recursion desired), 1 question, no other records
+        header = query_id.to_bytes(2, "big") + b"\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00"
+        question = b"".join(
+            len(label).to_bytes(1, "big") + label for label in self.host.encode("idna").split(b".") if label
+        )
+        # Root label, QTYPE A, QCLASS IN
+        return header + question + b"\x00\x00\x01\x00\x01"
+
+    def describe(self):
+        if self.server is not None:
+            return f"dns://{self.server}:{self.port}/{self.host}"
+        return f"dns://{self.host}"
+
+
+class HttpProbe(Probe):
+    """Send an HTTP HEAD request and check that a response status line comes back"""
+    kind = "http"
+
+    def __init__(self, url, timeout=DEFAULT_PROBE_TIMEOUT, expect_status=None):
+        super().__init__(timeout)
+        self.url = url
+        self.expect_status = expect_status
+        parts = urlsplit(url)
+        self.use_tls = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.use_tls else 80)
+        self.path = parts.path or "/"
+        if parts.query:
+            self.path += "?" + parts.query
+
+    # Shared by all HTTPS probes, building a context loads the CA store
+    _ssl_context = None
+
+    async def _probe(self):
+        ssl_context = None
+        if self.use_tls:
+            if HttpProbe._ssl_context is None:
+                HttpProbe._ssl_context = ssl.create_default_context()
+            ssl_context = HttpProbe._ssl_context
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=ssl_context)
+        try:
+            request = (
+                f"HEAD {self.path} HTTP/1.1\r\n"
+                f"Host: {self.host}\r\n"
+                "User-Agent: InternetMonitor\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(request.encode("ascii"))
+            await writer.drain()
+            status_line = await reader.readline()
+            answered = time.perf_counter_ns()
+        finally:
+            await _close_writer(writer)
+
+        parts = status_line.split()
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            return None
+        status = int(parts[1])
+        if self.expect_status is not None:
+            return answered if status == self.expect_status else None
+        # Any non server-error answer proves the path to the endpoint works
+        return answered if status < 500 else None
+
+    def describe(self):
+        return self.url
+
+
+def build_probes(specs, timeout=DEFAULT_PROBE_TIMEOUT):
+    """Create probe objects from the "probes" configuration entries"""
+    probes = []
+    for spec in specs:
+        try:
+            kind = spec.get("type", "tcp")
+            probe_timeout = float(spec.get("timeout", timeout))
+            if kind == "tcp":
+                probes.append(TcpProbe(spec["host"], spec["port"], probe_timeout))
+            elif kind == "dns":
+                probes.append(DnsProbe(spec["host"], probe_timeout, spec.get("server"), spec.get("port", 53)))
+            elif kind == "http":
+                probes.append(HttpProbe(spec["url"], probe_timeout, spec.get("expect_status")))
+            else:
+                print(f"Skipping probe with unknown type: {spec}")
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            print(f"Skipping malformed probe configuration {spec}: {e}")
+    return probes
+
+
+class ProbeExecutor:
+    """Background asyncio loop shared by one or more probe engines.
+
+    The loop runs on a single worker thread whatever the number of monitored
+    targets, and a semaphore caps the number of probes in flight, so CPU
+    and file descriptor use stay bounded as targets are added.
+    """
+
+    def __init__(self, max_concurrent=64):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.slots = asyncio.Semaphore(self.max_concurrent)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="ProbeExecutor", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        """Worker thread body: run the event loop until stop() is called"""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            # Cancel whatever is still running so every socket gets closed
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.close()
+
+    def submit(self, coro):
+        """Run a coroutine on the loop, return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout=5.0):
+        """Stop the event loop and wait for the worker thread to exit"""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+
+class ProbeEngine:
+    """Run the connectivity checks of one target on a background asyncio loop.
+
+    Checks are submitted from the Tk thread with request_check() and their
+    outcome is posted to the thread-safe `results` queue, which the GUI
+    drains from an `after` callback so the main loop never blocks on
+    network I/O. Several engines can share a ProbeExecutor and a results
+    queue, results are then told apart by their `target`.
+
+    A check launches every probe of the set at once. The first success
+    cancels the others and reports the connection as UP; DOWN is reported
+    as soon as `quorum` probes have failed.
+    """
+
+    def __init__(self, probes, quorum=1, executor=None, target=None, results=None):
+        if not probes:
+            raise ValueError("At least one probe is required")
+        self.probes = probes
+        self.quorum = max(1, min(int(quorum), len(probes)))
+        self.target = target
+        self.results = results if results is not None else queue.Queue()
+        self._pending = None
+        # Checks may be requested from the front end and from the link watcher thread
+        self._lock = threading.Lock()
+        # A private executor is created (and stopped with the engine) when none is shared
+        self._owns_executor = executor is None
+        self.executor = executor or ProbeExecutor(len(probes))
+
+    @timed("probe.check")
+    async def _check(self, delay=0):
+        """Run the probe set, short-circuit on first success or on quorum failure"""
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks = [asyncio.ensure_future(self._run_probe(probe)) for probe in self.probes]
+        failures = 0
+        result = CheckResult(False, None, None, self.target)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                probe, latency_ms = await next_done
+                if latency_ms is not None:
+                    result = CheckResult(True, latency_ms, probe.describe(), self.target)
+                    break
+                failures += 1
+                if failures >= self.quorum:
+                    break
+        finally:
+            # Cancel the probes still in flight and wait for their sockets to close
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return result
+
+    async def _run_probe(self, probe):
+        """Run a probe when a slot is free and pair its latency with the probe itself"""
+        async with self.executor.slots:
+            return probe, await probe.run()
+
+    def _on_check_done(self, future):
+        """Post the outcome of a finished check to the results queue"""
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error running connection check: {e}")
+            result = CheckResult(False, None, None, self.target)
+        self.results.put(result)
+
+    def request_check(self, delay=0):
+        """Schedule a connection check, after `delay` seconds, unless one is already pending"""
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return False
+            return self._submit(delay)
+
+    def expedite(self):
+        """Check now, replacing the pending check (e.g. after a network change)"""
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                # A cancelled check posts no result, so there is still a single chain of checks
+                self._pending.cancel()
+            return self._submit(0)
+
+    def _submit(self, delay):
+        if self.executor.loop.is_closed():
+            return False
+        self._pending = self.executor.submit(self._check(delay))
+        self._pending.add_done_callback(self._on_check_done)
+        return True
+
+    def get_results(self):
+        """Return all results posted since the last call without blocking"""
+        items = []
+        while True:
+            try:
+                items.append(self.results.get_nowait())
+            except queue.Empty:
+                return items
+
+    def stop(self, timeout=5.0):
+        """Cancel the pending check, and stop the executor if it is private"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.cancel()
+        if self._owns_executor:
+            self.executor.stop(timeout)
@@ -0,0 +1,53 @@
+import random
+
+
+class AdaptiveScheduler:
+    """Choose the delay before the next connection check.
+
+    While the link is down or has just changed state the scheduler probes at
+    the floor interval. Every consecutive check that confirms a stable UP
+    state multiplies the interval by `backoff_factor`, up to the ceiling.
+    A random jitter spreads checks so many monitors don't probe in lockstep.
+    """
+
+    def __init__(self, floor=1.0, ceiling=60.0, backoff_factor=2.0, jitter=0.2, settle_checks=3):
+        if floor <= 0 or ceiling < floor:
+            raise ValueError("Intervals must satisfy 0 < floor <= ceiling")
+        self.floor = float(floor)
+        self.ceiling = float(ceiling)
+        self.backoff_factor = max(1.0, float(backoff_factor))
+        self.jitter = min(max(float(jitter), 0.0), 1.0)
+        # Number of identical results required before backing off (flap protection)
+        self.settle_checks = max(0, int(settle_checks))
+        self.last_state = None
+        self.stable_checks = 0
+        self.interval = self.floor
+
+    def record(self, connected):
+        """Record a check result and return the delay (seconds) before the next check"""
+        if connected != self.last_state:
+            # Transition (or first check): go back to fast probing
+            self.last_state = connected
+            self.stable_checks = 0
+            self.interval = self.floor
+        else:
+            self.stable_checks += 1
+            if not connected or self.stable_checks <= self.settle_checks:
+                # Keep probing fast while down or until the link has settled
+                self.interval = self.floor
+            else:
+                self.interval = min(self.ceiling, self.interval * self.backoff_factor)
+        return self._apply_jitter(self.interval)
+
+    def _apply_jitter(self, interval):
+        """Randomize an interval by +/- jitter, staying within floor and ceiling"""
+        if not self.jitter:
+            return interval
+        jittered = interval * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+        return min(self.ceiling, max(self.floor, jittered))
+
+    def reset(self):
+        """Forget the history and probe at the floor interval again"""
+        self.last_state = None
+        self.stable_checks = 0
+        self.interval = self.floor
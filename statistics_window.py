@@ -0,0 +1,116 @@
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+import analytics
+from event_store import now_ms
+
+
+class StatisticsWindow(tk.Toplevel):
+    """Window showing availability statistics computed from the event log"""
+
+    def __init__(self, parent, localization, open_store):
+        super().__init__(parent)
+        self.localization = localization
+        # Factory returning a fresh event store, so the log is read on a worker thread
+        self.open_store = open_store
+        self.title(localization.get_string("statistics_title"))
+        self.geometry("520x520")
+        self._report = None
+        self._period = tk.StringVar(value="day")
+
+        frame = ttk.Frame(self, padding="10 10 10 10")
+        frame.pack(expand=True, fill=tk.BOTH)
+
+        # Period selector
+        period_frame = ttk.Frame(frame)
+        period_frame.pack(fill=tk.X)
+        for period in analytics.PERIODS:
+            ttk.Radiobutton(
+                period_frame, text=localization.get_string(f"stat_{period}"), value=period,
+                variable=self._period, command=self.refresh,
+            ).pack(side=tk.LEFT, padx=5)
+
+        # Summary values
+        summary_frame = ttk.Frame(frame)
+        summary_frame.pack(fill=tk.X, pady=10)
+        self._summary_labels = {}
+        for row, key in enumerate((
+            "stat_availability", "stat_outages", "stat_total_downtime",
+            "stat_longest_outage", "stat_mtbf", "stat_mttr",
+        )):
+            ttk.Label(summary_frame, text=localization.get_string(key)).grid(row=row, column=0, sticky=tk.W, padx=5)
+            value_label = ttk.Label(summary_frame, text="...")
+            value_label.grid(row=row, column=1, sticky=tk.E, padx=5)
+            self._summary_labels[key] = value_label
+        summary_frame.columnconfigure(0, weight=1)
+
+        # Outage duration histogram
+        ttk.Label(frame, text=localization.get_string("stat_durations")).pack(anchor=tk.W)
+        self._histogram_label = ttk.Label(frame, text="", justify=tk.LEFT, font=("Courier", 9))
+        self._histogram_label.pack(anchor=tk.W, padx=5, pady=(0, 10))
+
+        # Per-period table, most recent first
+        columns = ("period", "availability", "outages", "downtime")
+        self._table = ttk.Treeview(frame, columns=columns, show="headings", height=8)
+        headings = ("stat_period", "stat_availability", "stat_outages", "stat_total_downtime")
+        for column, key in zip(columns, headings):
+            self._table.heading(column, text=localization.get_string(key))
+            self._table.column(column, width=110, anchor=tk.E if column != "period" else tk.W)
+        self._table.pack(expand=True, fill=tk.BOTH)
+
+        self.refresh()
+
+    def refresh(self):
+        """Recompute the statistics on a worker thread"""
+        period = self._period.get()
+        result = {}
+
+        def work():
+            store = self.open_store()
+            try:
+                result["report"] = analytics.analyze(store.iter_events(), until_ms=now_ms(), period=period)
+            except Exception as e:
+                print(f"Error computing statistics: {e}")
+                result["report"] = None
+            finally:
+                store.close()
+
+        worker = threading.Thread(target=work, name="Statistics", daemon=True)
+        worker.start()
+        self._wait_for(worker, result, period)
+
+    def _wait_for(self, worker, result, period):
+        if worker.is_alive():
+            self.after(50, self._wait_for, worker, result, period)
+            return
+        if self.winfo_exists() and result.get("report") is not None:
+            self._show(result["report"], period)
+
+    def _show(self, report, period):
+        """Fill the window with a computed report"""
+        availability = report["availability"]
+        values = {
+            "stat_availability": f"{availability:.3f} %" if availability is not None else "-",
+            "stat_outages": str(report["outages"]),
+            "stat_total_downtime": analytics.format_duration(report["total_downtime_ms"]),
+            "stat_longest_outage": analytics.format_duration(report["longest_outage_ms"]),
+            "stat_mtbf": analytics.format_duration(report["mtbf_ms"]),
+            "stat_mttr": analytics.format_duration(report["mttr_ms"]),
+        }
+        for key, text in values.items():
+            self._summary_labels[key].config(text=text)
+
+        peak = max((count for _, count in report["histogram"]), default=0) or 1
+        self._histogram_label.config(text="\n".join(
+            f"{label:>10} {'#' * round(20 * count / peak):<20} {count}" for label, count in report["histogram"]
+        ))
+
+        self._table.delete(*self._table.get_children())
+        for row in reversed(report["periods"]):
+            self._table.insert("", tk.END, values=(
+                analytics.format_period(row["start_ms"], period),
+                f"{row['availability']:.3f} %",
+                row["outages"],
+                analytics.format_duration(row["downtime_ms"]),
+            ))
@@ -0,0 +1,59 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class TargetsWindow(tk.Toplevel):
+    """Compact table of the additional monitored targets, one row per target"""
+
+    def __init__(self, parent, localization, target_set):
+        super().__init__(parent)
+        self.localization = localization
+        self.target_set = target_set
+        self.title(localization.get_string("targets_title"))
+        self.geometry("560x400")
+
+        frame = ttk.Frame(self, padding="10 10 10 10")
+        frame.pack(expand=True, fill=tk.BOTH)
+
+        columns = ("status", "since", "latency")
+        self._table = ttk.Treeview(frame, columns=columns, show="tree headings")
+        self._table.heading("#0", text=localization.get_string("target_name"))
+        self._table.column("#0", width=180, anchor=tk.W)
+        for column, key in zip(columns, ("target_status", "target_since", "target_latency")):
+            self._table.heading(column, text=localization.get_string(key))
+            self._table.column(column, width=110, anchor=tk.W if column != "latency" else tk.E)
+        self._table.tag_configure("up", foreground="green")
+        self._table.tag_configure("down", foreground="red")
+        self._table.tag_configure("degraded", foreground="orange")
+
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self._table.yview)
+        self._table.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self._table.pack(expand=True, fill=tk.BOTH)
+
+        # Rows are created once, later updates only touch the targets that changed
+        for name, state in target_set.targets.items():
+            self._table.insert("", tk.END, iid=name, text=name)
+        self.update_targets(target_set.targets.values())
+
+    def update_targets(self, states):
+        """Refresh the rows of the given target states"""
+        if not self.winfo_exists():
+            return
+        for state in states:
+            if state.is_connected is None:
+                status, tag = "-", ""
+            elif state.is_connected and state.latency.is_degraded():
+                status, tag = self.localization.get_string("target_slow"), "degraded"
+            elif state.is_connected:
+                status, tag = self.localization.get_string("target_up"), "up"
+            else:
+                status, tag = self.localization.get_string("target_down"), "down"
+            # Time of the last transition, whichever of DOWN/UP is most recent
+            since = max(filter(None, (state.last_down_time, state.last_up_time)), default=None)
+            p95 = state.latency.percentile(95)
+            self._table.item(state.name, tags=(tag,), values=(
+                status,
+                since.strftime("%x %H:%M") if since else self.localization.get_string("not_available"),
+                f"{p95:.0f} ms" if p95 is not None else "-",
+            ))
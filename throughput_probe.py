@@ -0,0 +1,205 @@
+import queue
+import socket
+import ssl
+import threading
+import time
+from collections import deque, namedtuple
+from urllib.parse import urlsplit
+
+# Outcome of a throughput test: goodput in bits per second (None if the test
+# failed or was too short to be meaningful), bytes received and duration (s)
+ThroughputResult = namedtuple("ThroughputResult", ["goodput_bps", "bytes", "seconds"])
+
+# Size of the receive buffer, allocated once per probe
+BUFFER_SIZE = 64 * 1024
+# Tests that can transfer less than this are skipped, and results below it are not conclusive
+MIN_TEST_BYTES = 64 * 1024
+# Delay before the first test, so it does not compete with the start-up checks (seconds)
+FIRST_TEST_DELAY = 30.0
+
+
+class ThroughputBudget:
+    """Bytes and seconds spent on throughput tests over a sliding hour"""
+
+    def __init__(self, bytes_per_hour, seconds_per_hour):
+        self.bytes_per_hour = int(bytes_per_hour)
+        self.seconds_per_hour = float(seconds_per_hour)
+        # (monotonic time, bytes, seconds) of the tests of the last hour
+        self._spent = deque()
+
+    def _expire(self, now):
+        while self._spent and self._spent[0][0] <= now - 3600:
+            self._spent.popleft()
+
+    def remaining(self, now=None):
+        """Return the bytes and seconds still available in the current hour"""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        return (
+            self.bytes_per_hour - sum(spent[1] for spent in self._spent),
+            self.seconds_per_hour - sum(spent[2] for spent in self._spent),
+        )
+
+    def spend(self, size, seconds, now=None):
+        self._spent.append((time.monotonic() if now is None else now, size, seconds))
+
+
+class ThroughputProbe:
+    """Periodically download a capped number of bytes and measure the goodput.
+
+    Tests run on a dedicated thread, so the probe loop and the GUI never wait
+    for a transfer. Each test sends one HTTP GET with a Range header and
+    reads the response with recv_into() into a buffer allocated once, so
+    nothing is allocated per chunk. A test stops at max_bytes or after
+    max_seconds, and is shortened or skipped so that the bytes and seconds
+    spent over any hour stay within the budget. Results are posted to the
+    `results` queue.
+    """
+
+    def __init__(self, url, interval=900, max_bytes=2_000_000, max_seconds=10,
+                 budget_bytes_per_hour=10_000_000, budget_seconds_per_hour=60,
+                 should_run=None, results=None):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported throughput URL: {url}")
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.ssl_context = ssl.create_default_context() if parts.scheme == "https" else None
+        self.interval = float(interval)
+        self.max_bytes = int(max_bytes)
+        self.max_seconds = float(max_seconds)
+        self.budget = ThroughputBudget(budget_bytes_per_hour, budget_seconds_per_hour)
+        # Callable telling whether a test makes sense now (e.g. not while disconnected)
+        self.should_run = should_run or (lambda: True)
+        self.results = results if results is not None else queue.Queue()
+        self._buffer = bytearray(BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ThroughputProbe", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Worker thread body: one test every interval, within the budget"""
+        delay = min(FIRST_TEST_DELAY, self.interval)
+        while not self._stop.wait(delay):
+            delay = self.interval
+            if not self.should_run():
+                continue
+            byte_limit, time_limit = self.budget.remaining()
+            byte_limit = min(byte_limit, self.max_bytes)
+            time_limit = min(time_limit, self.max_seconds)
+            if byte_limit < MIN_TEST_BYTES or time_limit <= 0:
+                print("Throughput test skipped, hourly budget used up")
+                continue
+            started = time.monotonic()
+            try:
+                result = self.measure(byte_limit, time_limit)
+            except (OSError, ValueError) as e:
+                print(f"Throughput test against {self.url} failed: {e}")
+                result = ThroughputResult(None, 0, time.monotonic() - started)
+            self.budget.spend(result.bytes, result.seconds, started)
+            self.results.put(result)
+
+    def measure(self, byte_limit, time_limit):
+        """Run one test receiving at most byte_limit bytes within time_limit seconds"""
+        started = time.perf_counter()
+        deadline = started + time_limit
+        received = 0
+        # Connecting and the TLS handshake are part of the test: they only get what is left of
+        # time_limit, so a test never runs longer than its share of the budget
+        sock = self._connect(deadline)
+        try:
+            if self.ssl_context is not None:
+                sock.settimeout(self._time_left(deadline))
+                sock = self.ssl_context.wrap_socket(sock, server_hostname=self.host)
+            request = (
+                f"GET {self.path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Range: bytes=0-{byte_limit - 1}\r\nAccept-Encoding: identity\r\n"
+                "User-Agent: internet-monitor\r\nConnection: close\r\n\r\n"
+            )
+            sock.sendall(request.encode("ascii"))
+
+            # Response headers, read into the same buffer as the body
+            header_end = -1
+            while header_end < 0:
+                if received >= min(byte_limit, BUFFER_SIZE):
+                    raise ValueError("response headers too long")
+                sock.settimeout(self._time_left(deadline))
+                size = sock.recv_into(self._view[received:min(byte_limit, BUFFER_SIZE)])
+                if not size:
+                    raise ValueError("connection closed before the response headers")
+                received += size
+                header_end = self._buffer.find(b"\r\n\r\n", 0, received)
+            status_line = bytes(self._view[:self._buffer.find(b"\r\n", 0, received)])
+            fields = status_line.split()
+            if len(fields) < 2 or not fields[0].startswith(b"HTTP/") or not fields[1].isdigit():
+                raise ValueError(f"malformed HTTP status line {status_line[:80]!r}")
+            status = int(fields[1])
+            if status not in (200, 206):
+                raise ValueError(f"unexpected HTTP status {status}")
+
+            # Body: only the bytes received after the headers are timed
+            first_byte = time.perf_counter()
+            timed_bytes = 0
+            while received < byte_limit:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                sock.settimeout(remaining)
+                try:
+                    size = sock.recv_into(self._buffer, min(BUFFER_SIZE, byte_limit - received))
+                except socket.timeout:
+                    break
+                if not size:
+                    break
+                received += size
+                timed_bytes += size
+            elapsed = time.perf_counter() - first_byte
+        finally:
+            sock.close()
+
+        goodput_bps = None
+        if timed_bytes >= MIN_TEST_BYTES and elapsed > 0:
+            goodput_bps = timed_bytes * 8 / elapsed
+        return ThroughputResult(goodput_bps, received, time.perf_counter() - started)
+
+    @staticmethod
+    def _time_left(deadline):
+        """Seconds left before the deadline, raise socket.timeout once it has passed"""
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise socket.timeout("time limit reached")
+        return remaining
+
+    def _connect(self, deadline):
+        """Like socket.create_connection, but every address tried shares the same deadline"""
+        error = None
+        # Name resolution has no timeout of its own, it is usually answered from a cache
+        for family, kind, protocol, _, address in socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM):
+            sock = socket.socket(family, kind, protocol)
+            try:
+                sock.settimeout(self._time_left(deadline))
+                sock.connect(address)
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+                if isinstance(e, socket.timeout):
+                    break
+        raise error or OSError(f"no address for {self.host}")
+
+    def get_results(self):
+        """Return all results posted since the last call without blocking"""
+        items = []
+        while True:
+            try:
+                items.append(self.results.get_nowait())
+            except queue.Empty:
+                return items
+
+    def stop(self, timeout=2.0):
+        """Stop the worker thread (a running test ends at its time limit)"""
+        self._stop.set()
+        self._thread.join(timeout)
@@ -0,0 +1,100 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from analytics import downtime_before
+
+
+class MinMaxPyramid:
+    """Time series of samples with precomputed min/max levels of detail.
+
+    Level 0 holds the raw samples in time order; every entry of level k+1
+    aggregates `fanout` consecutive entries of level k into the time of its
+    first sample and the min/max of their values. Levels are extended as
+    samples are appended, so a query never touches more than about twice
+    the requested number of columns, whatever the length of the series.
+    """
+
+    def __init__(self, fanout=4):
+        if fanout < 2:
+            raise ValueError("fanout must be at least 2")
+        self.fanout = fanout
+        self.times = [array('q')]
+        self.mins = [array('d')]
+        self.maxs = [array('d')]
+
+    def __len__(self):
+        return len(self.times[0])
+
+    def append(self, timestamp_ms, value):
+        """Add a sample; timestamps older than the last one are moved up to it"""
+        base = self.times[0]
+        if base and timestamp_ms < base[-1]:
+            timestamp_ms = base[-1]
+        self._push(0, timestamp_ms, value, value)
+
+    def extend(self, samples):
+        """Add (timestamp_ms, value) samples in time order"""
+        for timestamp_ms, value in samples:
+            self.append(timestamp_ms, value)
+
+    def _push(self, level, timestamp_ms, low, high):
+        times, mins, maxs = self.times[level], self.mins[level], self.maxs[level]
+        times.append(timestamp_ms)
+        mins.append(low)
+        maxs.append(high)
+        if len(times) % self.fanout:
+            return
+        # A group of `fanout` entries is complete, summarize it one level up
+        if level + 1 == len(self.times):
+            self.times.append(array('q'))
+            self.mins.append(array('d'))
+            self.maxs.append(array('d'))
+        start = len(times) - self.fanout
+        self._push(level + 1, times[start], min(mins[start:]), max(maxs[start:]))
+
+    def samples(self):
+        """Yield the raw (timestamp_ms, value) samples"""
+        return zip(self.times[0], self.mins[0])
+
+    def columns(self, start_ms, end_ms, width):
+        """Return the (min, max) of each of `width` equal time columns, None for empty columns"""
+        result = [None] * width
+        if width <= 0 or end_ms <= start_ms or not self.times[0]:
+            return result
+        # Coarsest level that still has about two entries per column in the range
+        level = 0
+        count = bisect_right(self.times[0], end_ms) - bisect_left(self.times[0], start_ms)
+        while level + 1 < len(self.times) and count // self.fanout >= 2 * width:
+            count //= self.fanout
+            level += 1
+        times, mins, maxs = self.times[level], self.mins[level], self.maxs[level]
+        span = end_ms - start_ms
+        # Include the entry starting before the range, it may cover its beginning
+        first = max(0, bisect_left(times, start_ms) - (1 if level else 0))
+        last = bisect_right(times, end_ms)
+        for index in range(first, last):
+            column = (max(times[index], start_ms) - start_ms) * width // span
+            if column >= width:
+                column = width - 1
+            current = result[column]
+            if current is None:
+                result[column] = (mins[index], maxs[index])
+            else:
+                result[column] = (min(current[0], mins[index]), max(current[1], maxs[index]))
+        return result
+
+
+def downtime_columns(starts, ends, start_ms, end_ms, width):
+    """Return the fraction of each of `width` equal time columns spent in an outage.
+
+    Uses the cumulative downtime at the column edges, so the cost depends on
+    the width and not on the number of outages in the range.
+    """
+    if width <= 0 or end_ms <= start_ms:
+        return []
+    edges = [start_ms + (end_ms - start_ms) * i // width for i in range(width + 1)]
+    downtime = downtime_before(edges, starts, ends)
+    return [
+        (downtime[i + 1] - downtime[i]) / (edges[i + 1] - edges[i]) if edges[i + 1] > edges[i] else 0.0
+        for i in range(width)
+    ]
@@ -0,0 +1,183 @@
+import datetime
+import threading
+import tkinter as tk
+from array import array
+from tkinter import ttk
+
+import analytics
+from event_store import now_ms
+from instrumentation import timed
+from timeline import MinMaxPyramid, downtime_columns
+
+# Visible span of each range button (milliseconds)
+RANGES_MS = {
+    "timeline_hour": 3600_000,
+    "timeline_day": 24 * 3600_000,
+    "timeline_week": 7 * 24 * 3600_000,
+    "timeline_month": 30 * 24 * 3600_000,
+}
+
+CANVAS_WIDTH = 760
+CANVAS_HEIGHT = 260
+OUTAGE_BAND = 30
+AXIS_HEIGHT = 20
+
+
+class TimelineWindow(tk.Toplevel):
+    """Zoomable timeline of outages and latency.
+
+    Both series are reduced to one value per pixel column before drawing:
+    outages through the cumulative downtime at the column edges, latency
+    through the min/max pyramid. A redraw therefore costs the same for an
+    hour or for months of history and creates only a handful of canvas items.
+    """
+
+    def __init__(self, parent, localization, open_store, session_latency):
+        super().__init__(parent)
+        self.localization = localization
+        # Factory returning a fresh event store, so the log is read on a worker thread
+        self.open_store = open_store
+        self.session_latency = session_latency
+        self.title(localization.get_string("timeline_title"))
+        self.resizable(False, False)
+
+        self._starts = self._ends = ()
+        self._latency = MinMaxPyramid()
+        self._end_ms = now_ms()
+        self._span_ms = RANGES_MS["timeline_day"]
+        self._drag_x = None
+
+        frame = ttk.Frame(self, padding="10 10 10 10")
+        frame.pack(expand=True, fill=tk.BOTH)
+
+        range_frame = ttk.Frame(frame)
+        range_frame.pack(fill=tk.X)
+        for key, span_ms in RANGES_MS.items():
+            ttk.Button(range_frame, text=localization.get_string(key),
+                       command=lambda span=span_ms: self.show_range(span)).pack(side=tk.LEFT, padx=2)
+
+        self.canvas = tk.Canvas(frame, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, background="white",
+                                highlightthickness=0)
+        self.canvas.pack(pady=(5, 0))
+        # Wheel zooms around the pointer, dragging pans
+        self.canvas.bind("<MouseWheel>", lambda event: self.zoom(event.x, 0.8 if event.delta > 0 else 1.25))
+        self.canvas.bind("<Button-4>", lambda event: self.zoom(event.x, 0.8))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom(event.x, 1.25))
+        self.canvas.bind("<ButtonPress-1>", self._start_drag)
+        self.canvas.bind("<B1-Motion>", self._drag)
+
+        self.load()
+
+    def load(self):
+        """Read outages and logged latencies on a worker thread"""
+        result = {}
+        # Copied here, the session series keeps growing on the Tk thread
+        session_times = array('q', self.session_latency.times[0])
+        session_values = array('d', self.session_latency.mins[0])
+        session_start = session_times[0] if session_times else None
+
+        def work():
+            store = self.open_store()
+            try:
+                events = list(store.iter_events())
+            except Exception as e:
+                print(f"Error loading timeline: {e}")
+                events = []
+            finally:
+                store.close()
+            until_ms = now_ms()
+            starts, ends, _ = analytics.collect_outages(events, until_ms)
+            latency = MinMaxPyramid()
+            # Latencies logged with UP events (v2 log) before this session, then the session samples
+            latency.extend(
+                (event.timestamp_ms, event.latency_ms) for event in events
+                if event.latency_ms is not None and (session_start is None or event.timestamp_ms < session_start)
+            )
+            latency.extend(zip(session_times, session_values))
+            result["data"] = (starts, ends, latency, until_ms)
+
+        worker = threading.Thread(target=work, name="Timeline", daemon=True)
+        worker.start()
+        self._wait_for(worker, result)
+
+    def _wait_for(self, worker, result):
+        if worker.is_alive():
+            self.after(50, self._wait_for, worker, result)
+            return
+        if self.winfo_exists() and "data" in result:
+            self._starts, self._ends, self._latency, self._end_ms = result["data"]
+            self.redraw()
+
+    def show_range(self, span_ms):
+        """Show the last span_ms milliseconds"""
+        self._span_ms = span_ms
+        self._end_ms = now_ms()
+        self.redraw()
+
+    def zoom(self, x, factor):
+        """Zoom in (factor < 1) or out around the time under pixel x"""
+        start_ms = self._end_ms - self._span_ms
+        pivot = start_ms + self._span_ms * x / CANVAS_WIDTH
+        span_ms = int(min(max(self._span_ms * factor, 60_000), 366 * 24 * 3600_000))
+        self._end_ms = int(pivot + span_ms * (CANVAS_WIDTH - x) / CANVAS_WIDTH)
+        self._span_ms = span_ms
+        self.redraw()
+
+    def _start_drag(self, event):
+        self._drag_x = event.x
+
+    def _drag(self, event):
+        if self._drag_x is None:
+            return
+        self._end_ms -= int((event.x - self._drag_x) * self._span_ms / CANVAS_WIDTH)
+        self._drag_x = event.x
+        self.redraw()
+
+    @timed("gui.timeline_redraw")
+    def redraw(self):
+        """Draw the visible range, one value per pixel column"""
+        canvas = self.canvas
+        canvas.delete("all")
+        start_ms = self._end_ms - self._span_ms
+        width = CANVAS_WIDTH
+
+        # Outage band: consecutive columns with downtime merged into rectangles
+        fractions = downtime_columns(self._starts, self._ends, start_ms, self._end_ms, width)
+        x = 0
+        while x < width:
+            if fractions[x] <= 0:
+                x += 1
+                continue
+            begin = x
+            while x < width and fractions[x] > 0:
+                x += 1
+            canvas.create_rectangle(begin, 0, x, OUTAGE_BAND, fill="red", width=0)
+        canvas.create_line(0, OUTAGE_BAND, width, OUTAGE_BAND, fill="grey")
+
+        # Latency: min and max polylines over the non-empty columns
+        columns = self._latency.columns(start_ms, self._end_ms, width)
+        peak = max((column[1] for column in columns if column is not None), default=0)
+        plot_top, plot_bottom = OUTAGE_BAND + 10, CANVAS_HEIGHT - AXIS_HEIGHT
+        if peak > 0:
+            scale = (plot_bottom - plot_top) / peak
+            lows, highs = [], []
+            for x, column in enumerate(columns):
+                if column is not None:
+                    lows += (x, plot_bottom - column[0] * scale)
+                    highs += (x, plot_bottom - column[1] * scale)
+            if len(highs) >= 4:
+                canvas.create_line(*highs, fill="orange")
+                canvas.create_line(*lows, fill="green")
+            else:
+                canvas.create_oval(highs[0] - 2, highs[1] - 2, highs[0] + 2, highs[1] + 2, fill="green")
+            canvas.create_text(4, plot_top, anchor=tk.NW, text=f"{peak:.0f} ms", fill="grey")
+
+        # Time axis with a few labels
+        canvas.create_line(0, plot_bottom, width, plot_bottom, fill="grey")
+        label_format = "%H:%M" if self._span_ms <= 2 * 24 * 3600_000 else "%x"
+        for i in range(5):
+            x = i * (width - 1) // 4
+            when = datetime.datetime.fromtimestamp((start_ms + self._span_ms * x / width) / 1000)
+            canvas.create_text(x, CANVAS_HEIGHT - 2, anchor=tk.S if 0 < i < 4 else (tk.SW if i == 0 else tk.SE),
+                               text=when.strftime(label_format), fill="grey")
+